@@ -0,0 +1 @@
+"""Headless benchmarks for the app's hot paths; see run.py."""
@@ -0,0 +1,47 @@
+import argparse
+import json
+import sys
+
+DEFAULT_THRESHOLD = 1.10  # A median this much slower than the baseline counts as a regression
+
+
+def result_key(result):
+    return result["rows"], result["backend"], result["benchmark"], result["case"]
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """(key, baseline median, current median, ratio, regressed) for benchmarks present in both runs."""
+    base = {result_key(result): result["median_ms"] for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        key = result_key(result)
+        if key not in base:
+            continue
+        before, after = base[key], result["median_ms"]
+        ratio = after / before if before else float("inf") if after else 1.0
+        rows.append((key, before, after, ratio, ratio > threshold))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'rows':>10}  {'backend':<12}{'benchmark':<26}{'case':<34}{'before ms':>11}{'after ms':>11}{'ratio':>8}")
+    for (size, backend, benchmark, case), before, after, ratio, regressed in rows:
+        flag = "  SLOWER" if regressed else ""
+        print(f"{size:>10}  {backend:<12}{benchmark:<26}{case:<34}{before:>11.3f}{after:>11.3f}{ratio:>8.2f}{flag}")
+
+
+def load(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.compare baseline.json benchmark_results.json [--threshold 1.1]
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files by median time.")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+    rows = compare(load(args.baseline), load(args.current), args.threshold)
+    print_comparison(rows)
+    sys.exit(1 if any(row[4] for row in rows) else 0)
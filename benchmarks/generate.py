@@ -0,0 +1,84 @@
+import argparse
+import csv
+import os
+import random
+from datetime import date, timedelta
+
+DEFAULT_SEED = 2025
+
+# Merchant-like descriptions per category (the app's category set); amounts in rupees
+MERCHANTS = {
+    "Food": ["swiggy order", "zomato order", "pizza", "burger", "restaurant food", "cafe coffee day",
+             "groceries bigbasket", "snacks", "icecream", "dominos pizza"],
+    "Transport": ["uber ride", "ola ride", "metro card recharge", "bus ticket", "train ticket irctc",
+                  "fuel hp petrol", "taxi"],
+    "Entertainment": ["netflix subscription", "movie ticket pvr", "concert tickets", "steam game",
+                      "cinema snacks", "weekend trip"],
+    "Shopping": ["amazon order", "flipkart order", "flipkart headphones", "myntra clothing",
+                 "mall purchase", "croma electronics"],
+    "Utilities": ["electricity bill", "water bill", "internet airtel", "gas cylinder", "rent", "laundry"],
+    "Stationary": ["pen", "notebooks", "printer paper", "stationery store"],
+    "Other": ["checking out", "atm withdrawal", "upi transfer", "misc"],
+}
+AMOUNT_RANGES = {
+    "Food": (50, 900), "Transport": (30, 600), "Entertainment": (100, 1500), "Shopping": (200, 6000),
+    "Utilities": (300, 4000), "Stationary": (10, 300), "Other": (20, 2000),
+}
+CATEGORY_WEIGHTS = {
+    "Food": 30, "Transport": 20, "Entertainment": 8, "Shopping": 12, "Utilities": 8, "Stationary": 5, "Other": 7,
+}
+INCOME_DESCRIPTIONS = ["salary", "freelance payment", "refund", "interest credit"]
+INCOME_SHARE = 0.04  # Fraction of rows that are income
+REFERENCE_SHARE = 0.4  # Fraction of expenses with a reference number, so descriptions are not all repeats
+REFERENCES = 5000
+
+
+def span_days(rows):
+    """History length for a ledger size: about 50 transactions a day, between 90 days and 10 years."""
+    return min(max(rows // 50, 90), 3650)
+
+
+def iter_rows(rows, seed=DEFAULT_SEED, end=None):
+    """[amount, date, description] rows in date order, ending on `end` (default today).
+
+    The same seed and end date always give the same ledger, and a smaller
+    ledger draws its rows from the same stream as a larger one.
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    days = span_days(rows)
+    first = end - timedelta(days=days - 1)
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+    for i in range(rows):
+        day = first + timedelta(days=i * days // rows)
+        if rng.random() < INCOME_SHARE:
+            yield [round(rng.uniform(5000, 60000), 2), day.isoformat(), rng.choice(INCOME_DESCRIPTIONS)]
+            continue
+        category = rng.choices(categories, weights)[0]
+        description = rng.choice(MERCHANTS[category])
+        if rng.random() < REFERENCE_SHARE:
+            description = f"{description} ref {rng.randrange(REFERENCES)}"
+        low, high = AMOUNT_RANGES[category]
+        yield [-round(rng.uniform(low, high), 2), day.isoformat(), description]
+
+
+def write_ledger(path, rows, seed=DEFAULT_SEED, end=None):
+    """Writes a synthetic transactions.csv (no category columns, like hand-entered rows) atomically."""
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", newline="") as file:
+        csv.writer(file).writerows(iter_rows(rows, seed, end))
+    os.replace(temp_path, path)
+    return path
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.generate 100000 transactions.csv [--seed N] [--end yyyy-mm-dd]
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic ledger.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("path", nargs="?", default="transactions.csv")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last transaction date (default today)")
+    args = parser.parse_args()
+    write_ledger(args.path, args.rows, args.seed, args.end)
+    print(f"Wrote {args.rows} transactions to {args.path}.")
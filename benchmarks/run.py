@@ -0,0 +1,274 @@
+"""Times the app's hot paths on synthetic ledgers, headless.
+
+    python -m benchmarks.run --rows 1000 100000 --backend csv sqlite --repeat 5
+
+Each (ledger size, storage backend) pair runs in its own process, in a
+scratch directory holding the generated transactions.csv and a
+settings.json, with offscreen Qt, the Agg backend and HOME pointed at
+the scratch directory (so the model trained there never touches the
+user's). Results go to a JSON file; benchmarks.compare diffs two of them.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+try:
+    import resource  # Peak memory, where the platform has it
+except ImportError:
+    resource = None
+
+from benchmarks.compare import DEFAULT_THRESHOLD, compare, load, print_comparison
+from benchmarks.generate import DEFAULT_SEED, write_ledger
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "finance-tracker-ledgers")
+BACKENDS = ("csv", "sqlite", "columnar", "partitioned")
+SCHEMA_VERSION = 1
+
+CHART_SIZE = (800, 600)
+PREDICT_SAMPLE = 1000  # Distinct descriptions predicted one by one
+BENCHMARK_EXPENSE = [-250.0, None, "swiggy order"]  # Date filled in with today
+# Low limits, so adding an expense always takes the alerting path
+BUDGETS = {"Food": 1000.0, "Transport": 1000.0, "Shopping": 1000.0, "Utilities": 1000.0}
+
+
+def measure(results, benchmark, case, fn, repeat, setup=None):
+    """Times fn() `repeat` times (setup() untimed before each) and records the runs in milliseconds."""
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        runs.append((time.perf_counter() - started) * 1000)
+    results.append({
+        "benchmark": benchmark,
+        "case": case,
+        "runs_ms": [round(run, 3) for run in runs],
+        "min_ms": round(min(runs), 3),
+        "median_ms": round(statistics.median(runs), 3),
+    })
+
+
+def run_benchmarks(backend, repeat):
+    """Runs every benchmark in the current directory's ledger; returns the result records."""
+    from unittest import mock
+
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QApplication
+
+    app = QApplication.instance() or QApplication([])
+    from core.settings import load_settings
+    from core.store import create_store, get_store
+
+    if backend != "csv":
+        create_store(backend, load_settings()).load()  # One-time conversion stays out of the timings
+
+    results = []
+    windows = []
+
+    def start():
+        import main
+        windows.append(main.MainWindow())
+
+    # Startup happens once per process: import, model load/training and the initial categorization
+    measure(results, "startup", "MainWindow()", start, 1)
+    window = windows[0]
+    store = get_store()
+
+    from pages.add_expense import QMessageBox
+    from pages.reports import ChartCache, render_chart
+    from pages.transactions import load_rows
+
+    transaction = list(BENCHMARK_EXPENSE)
+    transaction[1] = date.today().isoformat()
+
+    def append_one():
+        store.append(list(transaction), "Food")
+
+    # Dashboard: summary after a reload and after an append (real refreshes), and a revisit
+    # with unchanged data, which only compares data keys
+    measure(results, "update_summary", "after reload",
+            lambda: window.apply_summary(window.compute_summary()), repeat, setup=store.load)
+    measure(results, "update_summary", "after append",
+            lambda: window.apply_summary(window.compute_summary()), repeat, setup=append_one)
+    measure(results, "update_summary", "unchanged (no-op check)", window.update_summary, repeat)
+
+    # Transactions: snapshot + model swap, revisit, sorting and filtering
+    table = window.get_page("Transactions")
+
+    def reset_table():
+        store.load()
+        table.rendered_key = None
+
+    measure(results, "update_table", "after reload", lambda: table.fill_table(load_rows()), repeat, setup=reset_table)
+    measure(results, "update_table", "after append", lambda: table.fill_table(load_rows()), repeat,
+            setup=append_one)
+    measure(results, "update_table", "unchanged (no-op check)", table.update_table, repeat)
+    measure(results, "update_table", "sort by amount", lambda: table.model.sort(0, Qt.DescendingOrder), repeat)
+    measure(results, "update_table", "sort by description", lambda: table.model.sort(1, Qt.AscendingOrder), repeat)
+    measure(results, "update_table", "filter", lambda: table.proxy.set_filter_text("swiggy"), repeat,
+            setup=lambda: table.proxy.set_filter_text(""))
+
+    # Reports: every chart type, rendered from scratch and served from a warm cache
+    reports = window.get_page("Reports")
+    width, height = CHART_SIZE
+    for index in range(reports.chart_selector.count()):
+        chart = reports.chart_selector.itemText(index)
+        measure(results, "update_chart", f"{chart} (cold)",
+                lambda: reports.show_chart(render_chart(chart, width, height, ChartCache())), repeat)
+        cache = ChartCache()
+        render_chart(chart, width, height, cache)
+        measure(results, "update_chart", f"{chart} (cached)",
+                lambda: reports.show_chart(render_chart(chart, width, height, cache)), repeat)
+
+    # Add Expense: append + budget check (the warning dialog is replaced so nothing blocks)
+    add_expense = window.get_page("Add Expense")
+
+    def add_and_check():
+        add_expense.check_budget_and_notify(add_expense.save_to_csv(list(transaction)))
+
+    with mock.patch.object(QMessageBox, "warning"):
+        add_and_check()  # Builds the month-to-date totals once
+        measure(results, "check_budget_and_notify", "after append", add_and_check, repeat)
+        measure(results, "check_budget_and_notify", "after reload", add_and_check, repeat, setup=store.load)
+
+    # Categorizer: single predictions with a cold and a warm cache, and the whole ledger in one batch
+    categorizer = window.ai_categorizer
+    descriptions = store.snapshot()[2]
+    sample = list(dict.fromkeys(descriptions))[:PREDICT_SAMPLE]
+
+    def predict_sample():
+        for description in sample:
+            categorizer.predict(description)
+
+    measure(results, "AICategorizer.predict", f"{len(sample)} distinct (cold cache)", predict_sample, repeat,
+            setup=categorizer.cache.clear)
+    measure(results, "AICategorizer.predict", f"{len(sample)} distinct (warm cache)", predict_sample, repeat)
+    measure(results, "AICategorizer.predict_batch", f"{len(descriptions)} rows (cold cache)",
+            lambda: categorizer.predict_batch(descriptions), repeat, setup=categorizer.cache.clear)
+
+    window.scheduler.shutdown()
+    app.processEvents()
+    return results
+
+
+def run_child(workdir, rows, backend, repeat, result_path):
+    """Benchmark process body: runs in workdir and writes its records to result_path."""
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = run_benchmarks(backend, repeat)
+    peak_rss_mb = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak_rss_mb = round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    for result in results:
+        result["rows"], result["backend"] = rows, backend
+    with open(result_path, "w") as file:
+        json.dump({"rows": rows, "backend": backend, "peak_rss_mb": peak_rss_mb, "results": results}, file)
+
+
+def cached_ledger(cache_dir, rows, seed, end):
+    """Path of the generated ledger for these parameters, generating it the first time."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"ledger-{rows}-{seed}-{end.isoformat()}.csv")
+    if not os.path.exists(path):
+        print(f"Generating {rows} transactions...")
+        write_ledger(path, rows, seed, end)
+    return path
+
+
+def run_process(ledger, rows, backend, repeat):
+    """Runs one (size, backend) pair in a fresh process and scratch directory; returns its payload."""
+    workdir = tempfile.mkdtemp(prefix="finance-tracker-bench-")
+    try:
+        shutil.copyfile(ledger, os.path.join(workdir, "transactions.csv"))
+        with open(os.path.join(workdir, "settings.json"), "w") as file:
+            json.dump({"storage_backend": backend, "budgets": BUDGETS}, file)
+        result_path = os.path.join(workdir, "results.json")
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen", MPLBACKEND="Agg", HOME=workdir)
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--child", workdir, str(rows), backend, str(repeat), result_path],
+            cwd=REPO_ROOT, env=env, check=True
+        )
+        with open(result_path, "r") as file:
+            return json.load(file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app's hot paths on synthetic ledgers.")
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_SIZES), help="ledger sizes")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=["csv"], help="storage backends")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--end", type=date.fromisoformat, default=None,
+                        help="last transaction date, yyyy-mm-dd (default today)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="where generated ledgers are kept")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--child", nargs=5, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        workdir, rows, backend, repeat, result_path = args.child
+        run_child(workdir, int(rows), backend, int(repeat), result_path)
+        return 0
+
+    end = args.end or date.today()
+    report = {
+        "schema": SCHEMA_VERSION,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"rows": args.rows, "backends": args.backend, "repeat": args.repeat,
+                   "seed": args.seed, "end": end.isoformat()},
+        "peak_rss_mb": [],
+        "results": [],
+    }
+    for rows in args.rows:
+        ledger = cached_ledger(args.cache_dir, rows, args.seed, end)
+        for backend in args.backend:
+            print(f"Benchmarking {rows} rows, {backend} backend...")
+            payload = run_process(ledger, rows, backend, args.repeat)
+            report["peak_rss_mb"].append({"rows": rows, "backend": backend, "value": payload["peak_rss_mb"]})
+            report["results"].extend(payload["results"])
+            for result in payload["results"]:
+                print(f"  {result['benchmark']:<28}{result['case']:<40}{result['median_ms']:>12.3f} ms")
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=1)
+    print(f"Results written to {args.output}.")
+
+    if args.baseline:
+        rows = compare(load(args.baseline), report, args.threshold)
+        print_comparison(rows)
+        return 1 if any(row[4] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
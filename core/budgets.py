@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+from datetime import date
+
+from core.settings import load_settings, update_settings
+from core.store import get_store
+
+logger = logging.getLogger(__name__)
+
+# Fractions of a budget that raise an alert, lowest first
+BUDGET_THRESHOLDS = (0.8, 1.0)
+
+# budgets.json from before budgets moved into settings.json; imported once
+LEGACY_BUDGET_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "budgets.json")
+
+
+def load_budgets():
+    """Budgets from settings.json, importing the legacy budgets.json the first time."""
+    settings = load_settings()
+    if "budgets" not in settings and os.path.exists(LEGACY_BUDGET_FILE):
+        try:
+            with open(LEGACY_BUDGET_FILE, "r") as file:
+                settings = update_settings(budgets=json.load(file))
+        except (OSError, ValueError) as e:
+            logger.warning("Could not import %s: %s", LEGACY_BUDGET_FILE, e)
+    return {category: float(limit) for category, limit in settings.get("budgets", {}).items()}
+
+
+def threshold_reached(spent, limit):
+    """Highest of BUDGET_THRESHOLDS that spent has reached against limit; None below them or if unbudgeted."""
+    if not limit:
+        return None
+    reached = [threshold for threshold in BUDGET_THRESHOLDS if spent >= threshold * limit]
+    return reached[-1] if reached else None
+
+
+class BudgetEngine:
+    """Month-to-date spend per category, kept current as transactions are added.
+
+    Subscribed to the store: a plain append moves one running total, in
+    O(1); anything else (recategorization, reload) or a new calendar
+    month marks the totals stale, and they are rebuilt from the store's
+    category totals for the current month on next use.
+    """
+
+    def __init__(self, store, budgets=None, today=date.today):
+        self.store = store
+        self.budgets = dict(budgets or {})
+        self.today = today
+        self.month = None  # "yyyy-mm" the running totals cover
+        self.spent = None  # Category -> net month-to-date amount, None when stale
+        self.synced_version = None  # Store version the totals reflect
+        self._lock = threading.RLock()  # Rebuilding can backfill, which notifies us re-entrantly
+        store.subscribe(self.on_store_changed)
+
+    def set_budgets(self, budgets):
+        with self._lock:
+            self.budgets = dict(budgets)
+
+    def on_store_changed(self, store):
+        with self._lock:
+            last_append = store.last_append
+            if (self.spent is not None and last_append is not None
+                    and last_append[0] == self.synced_version + 1 == store.version):
+                _version, amount, date_text, category = last_append
+                if date_text.startswith(self.month):
+                    self.spent[category] = self.spent.get(category, 0.0) + amount
+                self.synced_version = store.version
+            else:
+                self.spent = None
+
+    def _current(self):
+        """Running totals for this month, rebuilt when stale or after a month rollover."""
+        month = self.today().strftime("%Y-%m")
+        if self.spent is None or month != self.month:
+            # category_totals brings categories current itself, for just the month where the backend
+            # can (partitioned); a backfill that changes rows bumps the version and we rebuild next time
+            version = self.store.version
+            spent = self.store.category_totals(f"{month}-01", f"{month}-31")
+            self.month, self.synced_version = month, version
+            # If the store moved on while we read, rebuild again next time
+            self.spent = spent if self.store.version == version else None
+            return spent
+        return self.spent
+
+    def status(self, category):
+        """(spent, limit, highest threshold reached or None) for a category; limit is None if unbudgeted."""
+        with self._lock:
+            spent = abs(self._current().get(category, 0.0))
+            limit = self.budgets.get(category)
+        return spent, limit, threshold_reached(spent, limit)
+
+    def alerts(self, categories=None):
+        """(category, spent, limit, threshold) for budgeted categories at or over a threshold."""
+        with self._lock:
+            names = list(self.budgets) if categories is None else [c for c in categories if c in self.budgets]
+        alerts = []
+        for category in names:
+            spent, limit, threshold = self.status(category)
+            if threshold is not None:
+                alerts.append((category, spent, limit, threshold))
+        return alerts
+
+
+_engine = None
+
+
+def get_budget_engine():
+    """Returns the shared engine, with budgets from settings.json."""
+    global _engine
+    if _engine is None:
+        _engine = BudgetEngine(get_store(), load_budgets())
+    return _engine
+
+
+def save_budgets(budgets):
+    """Stores budgets in settings.json and applies them to the running engine."""
+    update_settings(budgets=budgets)
+    get_budget_engine().set_budgets(budgets)
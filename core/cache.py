@@ -0,0 +1,75 @@
+import threading
+from collections import OrderedDict
+
+MISSING = object()  # Returned by PredictionCache.get when a key is absent (None is a valid cached value)
+
+
+def normalize_description(description):
+    """Cache key for a description: lowercase with collapsed whitespace."""
+    return " ".join(str(description).lower().split())
+
+
+class PredictionCache:
+    """Bounded memo table for per-description predictions.
+
+    policy="lru" evicts the least recently used entry, policy="fifo" the
+    oldest inserted one. Hit/miss counters survive clear() so they can be
+    read over a whole session.
+    """
+
+    POLICIES = ("lru", "fifo")
+
+    def __init__(self, maxsize=4096, policy="lru"):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                if self.policy == "lru":
+                    self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            if key in self._data:
+                self._data[key] = value
+                if self.policy == "lru":
+                    self._data.move_to_end(key)
+                return
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Returns size and hit/miss counters as a dict."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,249 @@
+"""Reports and exports from the command line, without Qt.
+
+    python -m core.cli summary
+    python -m core.cli monthly --by-category
+    python -m core.cli weekly
+    python -m core.cli categories
+    python -m core.cli budgets --month 2025-05
+    python -m core.cli export --start 2025-01-01 --output categorized.csv
+
+Every command accepts --data-dir (where transactions.csv and
+settings.json live) and --json. Figures come from the same store,
+rollups, categorizer and budget thresholds the GUI uses, so they match
+the Dashboard and the Reports page.
+
+Reports are read-only: rows the current categorizer did not produce
+are recategorized in memory and the ledger, journal and saved rollups
+are left as they are. --persist writes those categories and rollups
+back, as the GUI does. Either way the model may be trained and saved
+when there is none, and a first run on the columnar backend converts
+transactions.csv.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+from datetime import date
+
+from core.budgets import load_budgets, threshold_reached
+from core.log import configure_logging
+from core.rollups import week_label
+from core.settings import load_settings
+from core.store import get_store
+from core.streaming import categorize_chunks, fold_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def open_ledger(train=True, persist=False):
+    """(store, categorizer) for the configured ledger.
+
+    With persist, the categorizer is registered and stale rows are
+    recategorized in the ledger, as the GUI does; otherwise nothing is
+    written and reports recategorize in memory (see report_rollups).
+    """
+    from core.categorizer import TransactionCategorizer
+
+    store = get_store()
+    categorizer = TransactionCategorizer(incremental=load_settings().get("incremental_learning", False))
+    if train:
+        try:
+            categorizer.train_defaults()  # Loads the saved model; only fits when there is none
+        except (ImportError, OSError, ValueError) as e:
+            logger.warning("Model unavailable, categorizing with rules only: %s", e)
+    if persist:
+        categorizer.register(store)
+        backfilled = store.backfill()
+        if backfilled:
+            logger.info("Recategorized %d transactions.", backfilled)
+    return store, categorizer
+
+
+def categorized_chunks(store, categorizer):
+    """The ledger's row chunks with categories current, without writing to the ledger."""
+    return categorize_chunks(store.iter_chunks(), categorizer.categorize_expenses, categorizer.version)
+
+
+def report_rollups(store, categorizer):
+    """Rollups with every row categorized by categorizer.
+
+    The saved rollups are used when they already are; otherwise the
+    ledger is streamed once and folded in memory.
+    """
+    rollups = store.ensure_rollups()
+    if rollups.categorized == categorizer.version:
+        return rollups
+    return fold_rollups(store.iter_chunks(), categorizer.categorize_expenses, categorizer.version)
+
+
+def summary(rollups):
+    income, expense, category_totals, category_counts = rollups.summary()
+    return {
+        "income": income,
+        "expense": expense,
+        "balance": income - expense,
+        "categories": {
+            category: {"total": total, "count": category_counts.get(category, 0)}
+            for category, total in sorted(category_totals.items())
+        },
+    }
+
+
+def monthly(rollups, by_category=False):
+    """Expenses per month, or per month and category."""
+    if by_category:
+        breakdown = {}
+        for (month, category), total in rollups.expenses("month", by_category=True).items():
+            breakdown.setdefault(month, {})[category] = total
+        return breakdown
+    return rollups.expenses("month")
+
+
+def weekly(rollups):
+    """Expenses per ISO week, labelled like the Weekly Spending chart."""
+    return {week_label(week): total for week, total in rollups.expenses("week").items()}
+
+
+def categories(rollups):
+    """Expenses per category (the Reports pie chart)."""
+    return rollups.expenses()
+
+
+def budget_status(rollups, month=None):
+    """[category, spent, limit, threshold reached] for each budgeted category in a month (default this one)."""
+    totals = rollups.net(month or date.today().strftime("%Y-%m"))
+    status = []
+    for category, limit in sorted(load_budgets().items()):
+        spent = abs(totals.get(category, 0.0))
+        status.append([category, spent, limit, threshold_reached(spent, limit)])
+    return status
+
+
+def export_rows(chunks, start=None, end=None):
+    """Yields (date, amount, description, category) for rows dated within [start, end]."""
+    for chunk in chunks:
+        for amount, date_text, description, category, _version in chunk:
+            if (start is None or date_text >= start) and (end is None or date_text <= end):
+                yield date_text, amount, description, category
+
+
+def print_table(mapping, header):
+    width = max([len(str(key)) for key in mapping] + [len(header[0])])
+    print(f"{header[0]:<{width}}  {header[1]:>12}")
+    for key, value in mapping.items():
+        print(f"{key:<{width}}  {value:>12.2f}")
+
+
+def run(args):
+    """Runs one subcommand; returns the process exit status."""
+    store, categorizer = open_ledger(train=not args.rules_only, persist=args.persist)
+    if args.command == "export":
+        rows = export_rows(categorized_chunks(store, categorizer), args.start, args.end)
+        output = open(args.output, "w", newline="") if args.output else sys.stdout
+        try:
+            if args.json:
+                records = [dict(zip(("date", "amount", "description", "category"), row)) for row in rows]
+                json.dump(records, output)
+                output.write("\n")
+                exported = len(records)
+            else:
+                writer = csv.writer(output)
+                writer.writerow(["date", "amount", "description", "category"])
+                exported = 0
+                for row in rows:
+                    writer.writerow(row)
+                    exported += 1
+        finally:
+            if args.output:
+                output.close()
+        if args.output:
+            logger.info("Exported %d transactions to %s.", exported, args.output)
+        return 0
+
+    rollups = report_rollups(store, categorizer)
+    if args.command == "summary":
+        result = summary(rollups)
+        if args.json:
+            print(json.dumps(result, indent=1))
+        else:
+            print(f"Total Income: ₹{result['income']:.2f}")
+            print(f"Total Expense: ₹{result['expense']:.2f}")
+            print(f"Remaining Balance: ₹{result['balance']:.2f}")
+            print_table({category: values["total"] for category, values in result["categories"].items()},
+                        ("Category", "Total (₹)"))
+    elif args.command == "monthly":
+        result = monthly(rollups, args.by_category)
+        if args.json:
+            print(json.dumps(result, indent=1))
+        elif args.by_category:
+            for month, totals in result.items():
+                print(month)
+                for category, total in totals.items():
+                    print(f"  {category:<20}{total:>12.2f}")
+        else:
+            print_table(result, ("Month", "Spent (₹)"))
+    elif args.command in ("weekly", "categories"):
+        result = weekly(rollups) if args.command == "weekly" else categories(rollups)
+        if args.json:
+            print(json.dumps(result, indent=1))
+        else:
+            print_table(result, ("Week" if args.command == "weekly" else "Category", "Spent (₹)"))
+    elif args.command == "budgets":
+        result = budget_status(rollups, args.month)
+        if args.json:
+            print(json.dumps([dict(zip(("category", "spent", "limit", "threshold"), row)) for row in result], indent=1))
+        else:
+            for category, spent, limit, threshold in result:
+                flag = "" if threshold is None else "  EXCEEDED" if threshold >= 1.0 else f"  over {threshold:.0%}"
+                print(f"{category:<20}{spent:>12.2f} / {limit:.2f}{flag}")
+        if args.fail_on_alert and any(row[3] is not None for row in result):
+            return 2
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="Finance Tracker reports without the GUI.")
+    parser.add_argument("--data-dir", help="directory holding transactions.csv and settings.json (default: current)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of tables")
+    parser.add_argument("--rules-only", action="store_true", help="do not load or train the model")
+    parser.add_argument("--persist", action="store_true",
+                        help="save recategorized rows and rollups to the ledger (default: read-only)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log progress to stderr")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="income, expense, balance and per-category totals")
+    monthly_parser = commands.add_parser("monthly", help="expenses per month")
+    monthly_parser.add_argument("--by-category", action="store_true")
+    commands.add_parser("weekly", help="expenses per ISO week")
+    commands.add_parser("categories", help="expenses per category")
+    budgets_parser = commands.add_parser("budgets", help="month-to-date spend against budgets")
+    budgets_parser.add_argument("--month", help="yyyy-mm (default: this month)")
+    budgets_parser.add_argument("--fail-on-alert", action="store_true", help="exit with status 2 if any alert")
+    export_parser = commands.add_parser("export", help="categorized transactions as CSV (or JSON)")
+    export_parser.add_argument("--start", help="first date, yyyy-mm-dd")
+    export_parser.add_argument("--end", help="last date, yyyy-mm-dd")
+    export_parser.add_argument("--output", help="file to write (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.data_dir:
+        os.chdir(args.data_dir)
+    configure_logging("INFO" if args.verbose else "WARNING")
+    try:
+        status = run(args)
+        sys.stdout.flush()  # Surface a closed pipe here rather than at interpreter exit
+        return status
+    except BrokenPipeError:
+        # The reader (e.g. head) went away; send the rest nowhere so exit does not fail flushing
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if args.persist:
+            get_store().flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
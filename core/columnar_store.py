@@ -0,0 +1,446 @@
+import json
+import logging
+import os
+import re
+import shutil
+
+import numpy as np
+
+from core.instrumentation import count, span
+from core.rollups import Rollups
+from core.store import DEFAULT_CHUNK_ROWS, MANUAL_VERSION, TRANSACTIONS_FILE, TransactionStore
+
+logger = logging.getLogger(__name__)
+
+COLUMNS_DIR = "transactions.columns"
+MISSING_DAY = np.iinfo(np.int32).min  # Day number stored for dates that are not ISO yyyy-mm-dd
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# File name -> dtype; every file holds one value per row except the offsets (one extra)
+AMOUNTS = "amounts.i64"  # Amount in paise
+DAYS = "days.i32"  # Days since 1970-01-01
+CATEGORIES = "categories.i32"  # Code into dictionary["categories"]
+VERSIONS = "versions.i32"  # Code into dictionary["versions"]
+OFFSETS = "descriptions.offsets.i64"  # Byte offset of each description in the blob, plus the end
+BLOB = "descriptions.blob"  # UTF-8 descriptions back to back
+DATE_OFFSETS = "dates.offsets.i64"  # Byte offset of each date's text in the date blob, plus the end
+DATE_BLOB = "dates.blob"  # UTF-8 text of the dates that are not ISO yyyy-mm-dd; empty for the rest
+DICTIONARY = "dictionary.json"
+
+DTYPES = {
+    AMOUNTS: np.int64, DAYS: np.int32, CATEGORIES: np.int32, VERSIONS: np.int32, OFFSETS: np.int64,
+    DATE_OFFSETS: np.int64,
+}
+TEXT_COLUMNS = ((OFFSETS, BLOB), (DATE_OFFSETS, DATE_BLOB))  # (offsets file, blob file) pairs
+
+
+def to_day(date):
+    """Day number of an ISO yyyy-mm-dd date; MISSING_DAY for anything else (blank, other formats)."""
+    try:
+        day = np.datetime64(date, "D")
+    except ValueError:
+        return MISSING_DAY
+    # Blank parses as NaT, and "2025-05" or "2025-05-12T10:00" as a day that would not read back the same
+    if np.isnat(day) or str(day) != date:
+        return MISSING_DAY
+    return int(day.astype(np.int64))
+
+
+def bound_day(date, upper):
+    """Day number of a query bound, agreeing with string comparison of ISO dates.
+
+    Month-end bounds like "2025-06-31" are not real days: as an upper
+    bound that is 2025-06-30, as a lower bound 2025-07-01.
+    """
+    day = to_day(date)
+    if day != MISSING_DAY:
+        return day
+    if not ISO_DATE.fullmatch(date):
+        raise ValueError(f"not an ISO date: {date!r}")
+    last = int(((np.datetime64(date[:7], "M") + 1).astype("datetime64[D]") - 1).astype(np.int64))
+    return last if upper else last + 1
+
+
+def day_strings(days, texts=None):
+    """Day numbers back to yyyy-mm-dd strings, vectorized; texts maps position -> non-ISO date text."""
+    strings = days.astype("datetime64[D]").astype(str).astype(object)
+    strings[days == MISSING_DAY] = ""
+    for index, text in (texts or {}).items():
+        strings[index] = text
+    return strings.tolist()
+
+
+class ColumnarTransactionStore(TransactionStore):
+    """TransactionStore persisted as binary column files read through numpy.memmap.
+
+    Amounts are int64 paise, dates int32 day numbers (the text of dates
+    that are not ISO yyyy-mm-dd is kept in a second offsets + bytes pair),
+    categories and their version tags dictionary-encoded int32 codes, and
+    descriptions an offsets + bytes blob. Appends extend every file in place; category
+    updates overwrite codes in place, so nothing is ever rewritten.
+
+    The memmaps are the store's data: totals, category_totals, the
+    rollups, backfill and to_dataframe work on the arrays, and chunks are
+    sliced from them. The list columns the table reads are decoded (with
+    vectorized numpy conversions, not text parsing) only when a caller
+    needs every row. A crash between file appends can leave some columns
+    longer than others; open() truncates them back to the rows present in
+    every file.
+    """
+
+    def __init__(self, path=COLUMNS_DIR, csv_path=TRANSACTIONS_FILE):
+        super().__init__(path)
+        self.csv_path = csv_path
+        self.dictionary = {"categories": [], "versions": []}
+        self._codes = {}  # (dictionary key, value) -> code
+        self._dictionary_changed = False  # A code was added since dictionary.json was written
+        self._mapped = None  # Column name -> memmap; dropped whenever a file is written
+
+    def column_path(self, name):
+        return os.path.join(self.path, name)
+
+    def open(self):
+        """Maps the column files, importing the CSV ledger the first time; nothing is decoded yet."""
+        self._prepare()
+        return self
+
+    def _prepare(self):
+        if not os.path.isdir(self.path):
+            if os.path.exists(self.csv_path):
+                self.convert_csv()
+            else:
+                os.makedirs(self.path)
+        with self._lock:
+            self._mapped = None
+            self._load_dictionary()
+            self._add_date_column()
+            self._repair()
+
+    def load(self):
+        """(Re)maps the column files and decodes the list columns."""
+        self._prepare()
+        with self._lock:
+            self._decode()
+            self.rollups = None
+            self.backfilled_version = None
+            self.version += 1
+        return self
+
+    def ensure_loaded(self):
+        """Decodes the list columns from the mapped files the first time a caller needs every row."""
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self._decode()
+
+    def _decode(self):
+        with span("store.load"):
+            arrays = self.arrays()
+            n = len(arrays[AMOUNTS])
+            self.amounts = (arrays[AMOUNTS] / 100).tolist()
+            self.dates = self._dates(arrays, 0, n)
+            self.descriptions = self._descriptions(arrays, 0, n)
+            self.categories = self._names("categories", arrays[CATEGORIES])
+            self.category_versions = self._names("versions", arrays[VERSIONS])
+            count("rows parsed", n)
+            self.loaded = True
+
+    def row_count(self):
+        return len(self.arrays()[AMOUNTS])
+
+    def convert_csv(self):
+        """Builds the column files from the CSV ledger in a temporary directory, renamed into place when done.
+
+        A conversion that fails leaves no column directory behind, so the
+        next launch converts again instead of showing an empty ledger.
+        """
+        temp_path = self.path + ".tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        source = TransactionStore(self.csv_path).load()
+        ColumnarTransactionStore(temp_path, self.csv_path)._append_columns(list(zip(
+            source.amounts, source.dates, source.descriptions, source.categories, source.category_versions
+        )))
+        os.replace(temp_path, self.path)
+        logger.info("Converted %d transactions to %s.", len(source.amounts), self.path)
+
+    def _load_dictionary(self):
+        try:
+            with open(self.column_path(DICTIONARY), "r") as file:
+                self.dictionary = json.load(file)
+        except FileNotFoundError:
+            self.dictionary = {"categories": [], "versions": []}
+        self._dictionary_changed = False
+        self._codes = {
+            (key, value): code for key in ("categories", "versions") for code, value in enumerate(self.dictionary[key])
+        }
+
+    def _code(self, key, value):
+        """Dictionary code for a category or version tag, adding it if new (caller saves the dictionary)."""
+        code = self._codes.get((key, value))
+        if code is None:
+            code = self._codes[(key, value)] = len(self.dictionary[key])
+            self.dictionary[key].append(value)
+            self._dictionary_changed = True
+        return code
+
+    def _save_dictionary(self):
+        """Writes dictionary.json if a category or version tag was added since it was last written."""
+        if not self._dictionary_changed:
+            return
+        self._dictionary_changed = False
+        temp_path = self.column_path(DICTIONARY) + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.dictionary, file)
+        os.replace(temp_path, self.column_path(DICTIONARY))
+
+    def _map(self, name, dtype):
+        path = self.column_path(name)
+        count = (os.path.getsize(path) if os.path.exists(path) else 0) // np.dtype(dtype).itemsize
+        return np.memmap(path, dtype=dtype, mode="r", shape=(count,)) if count else np.zeros(0, dtype)
+
+    def _add_date_column(self):
+        """Adds the date text column to a directory written before it existed.
+
+        Texts an older dictionary kept by row index move into the column.
+        """
+        if os.path.exists(self.column_path(DATE_OFFSETS)):
+            return
+        rows = len(self._map(AMOUNTS, np.int64))
+        texts = self.dictionary.pop("dates", {})
+        if texts:
+            self._dictionary_changed = True
+            self._save_dictionary()
+        if rows:
+            self._append_text(DATE_OFFSETS, DATE_BLOB, [texts.get(str(i), "").encode("utf-8") for i in range(rows)])
+
+    def _repair(self):
+        """Truncates every file to the rows fully written to all of them (after a torn append)."""
+        mapped = {name: self._map(name, dtype) for name, dtype in DTYPES.items()}
+        blob_sizes = {
+            blob: os.path.getsize(self.column_path(blob)) if os.path.exists(self.column_path(blob)) else 0
+            for _offsets, blob in TEXT_COLUMNS
+        }
+        n = min(len(mapped[name]) for name in (AMOUNTS, DAYS, CATEGORIES, VERSIONS))
+        for offsets, blob in TEXT_COLUMNS:
+            n = min(n, max(len(mapped[offsets]) - 1, 0))
+            while n and mapped[offsets][n] > blob_sizes[blob]:
+                n -= 1
+        blob_ends = {blob: int(mapped[offsets][n]) if n else 0 for offsets, blob in TEXT_COLUMNS}
+        del mapped
+        for name, dtype in DTYPES.items():
+            rows = n + 1 if name in (OFFSETS, DATE_OFFSETS) and n else n
+            path = self.column_path(name)
+            if os.path.exists(path) and os.path.getsize(path) > rows * np.dtype(dtype).itemsize:
+                os.truncate(path, rows * np.dtype(dtype).itemsize)
+        for blob, blob_end in blob_ends.items():
+            if blob_sizes[blob] > blob_end:
+                os.truncate(self.column_path(blob), blob_end)
+
+    def arrays(self):
+        """Read-only memmaps of every column; remapped after writes."""
+        with self._lock:
+            if self._mapped is None:
+                mapped = {name: self._map(name, dtype) for name, dtype in DTYPES.items()}
+                for offsets, blob in TEXT_COLUMNS:
+                    mapped[blob] = self._map(blob, np.uint8)
+                    if not len(mapped[offsets]):
+                        mapped[offsets] = np.zeros(1, np.int64)
+                self._mapped = mapped
+            return self._mapped
+
+    def _names(self, key, codes):
+        """Dictionary values of an array of category or version codes, as a list."""
+        names = np.array(self.dictionary[key] or [""], dtype=object)
+        return names[codes].tolist() if len(codes) else []
+
+    def _dates(self, arrays, start, stop):
+        """Date strings of rows [start, stop); only the rows with a stored text are decoded from the date blob."""
+        offsets = arrays[DATE_OFFSETS][start:stop + 1]
+        texts = {
+            i: arrays[DATE_BLOB][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+            for i in np.flatnonzero(np.diff(offsets)).tolist()
+        }
+        return day_strings(arrays[DAYS][start:stop], texts)
+
+    def _descriptions(self, arrays, start, stop):
+        """Descriptions of rows [start, stop), from one read of the blob."""
+        offsets = arrays[OFFSETS][start:stop + 1].tolist()
+        blob = arrays[BLOB][offsets[0]:offsets[-1]].tobytes()
+        base = offsets[0]
+        return [blob[offsets[i] - base:offsets[i + 1] - base].decode("utf-8") for i in range(stop - start)]
+
+    def _chunk(self, arrays, start, stop):
+        """Rows [start, stop) as [amount, date, description, category, version] lists."""
+        return [list(row) for row in zip(
+            (arrays[AMOUNTS][start:stop] / 100).tolist(), self._dates(arrays, start, stop),
+            self._descriptions(arrays, start, stop), self._names("categories", arrays[CATEGORIES][start:stop]),
+            self._names("versions", arrays[VERSIONS][start:stop])
+        )]
+
+    def iter_chunks(self, chunk_rows=None):
+        """Slices of the mapped columns, unless the list columns are already decoded."""
+        if self.loaded:
+            yield from super().iter_chunks(chunk_rows)
+            return
+        chunk_rows = chunk_rows or DEFAULT_CHUNK_ROWS
+        start = 0
+        while True:
+            with self._lock:
+                arrays = self.arrays()
+                stop = min(start + chunk_rows, len(arrays[AMOUNTS]))
+                chunk = self._chunk(arrays, start, stop)
+            if not chunk:
+                return
+            yield chunk
+            start = stop
+
+    def _stale_batches(self, current):
+        """Stale rows found by comparing version codes in numpy; only chunks that hold some are decoded."""
+        with self._lock:
+            current_codes = [self._codes[key] for key in (("versions", current), ("versions", MANUAL_VERSION))
+                             if key in self._codes]
+            arrays = self.arrays()
+            stale = np.flatnonzero(~np.isin(arrays[VERSIONS], current_codes))
+            n = len(arrays[AMOUNTS])
+        for start in range(0, n, DEFAULT_CHUNK_ROWS):
+            stop = min(start + DEFAULT_CHUNK_ROWS, n)
+            indices = stale[np.searchsorted(stale, start):np.searchsorted(stale, stop)].tolist()
+            if indices:
+                with self._lock:
+                    chunk = self._chunk(self.arrays(), start, stop)
+                yield indices, [chunk[i - start] for i in indices]
+
+    def _write_batch(self, keys, rows):
+        self._write_codes(keys, [row[3] for row in rows], [row[4] for row in rows])
+
+    def _build_rollups(self):
+        """Rollups from sums per (day, category code) in numpy; only the distinct pairs reach Python."""
+        rollups = Rollups()
+        with self._lock:
+            arrays = self.arrays()
+            if not len(arrays[AMOUNTS]):
+                return rollups
+            names = self.dictionary["categories"]
+            paise = np.asarray(arrays[AMOUNTS])
+            pairs, group = np.unique(
+                (arrays[DAYS].astype(np.int64) - MISSING_DAY) * len(names) + arrays[CATEGORIES], return_inverse=True
+            )
+            income = np.bincount(group, weights=np.where(paise > 0, paise, 0))
+            expense = np.bincount(group, weights=np.where(paise > 0, 0, -paise))
+            rows = np.bincount(group)
+        days = pairs // len(names) + MISSING_DAY
+        # Dates that are not ISO all fall in the "" period, whatever their text
+        for date_text, code, pair_income, pair_expense, pair_rows in zip(
+                day_strings(days), (pairs % len(names)).tolist(), income.tolist(), expense.tolist(), rows.tolist()):
+            rollups.add_totals(date_text, names[code], round(pair_income), round(pair_expense), pair_rows)
+        return rollups
+
+    def _append_text(self, offsets_name, blob_name, encoded):
+        """Extends an offsets + blob pair with encoded byte strings, the blob first."""
+        offsets_path = self.column_path(offsets_name)
+        blob_path = self.column_path(blob_name)
+        end = os.path.getsize(blob_path) if os.path.exists(blob_path) else 0
+        offsets = np.cumsum([end] + [len(text) for text in encoded], dtype=np.int64)
+        if not os.path.exists(offsets_path) or not os.path.getsize(offsets_path):
+            offsets_to_write = offsets  # The first rows also record the leading 0
+        else:
+            offsets_to_write = offsets[1:]
+        with open(blob_path, "ab") as file:
+            file.write(b"".join(encoded))
+        with open(offsets_path, "ab") as file:
+            file.write(offsets_to_write.tobytes())
+
+    def _append_columns(self, rows):
+        """Extends every column file with [amount, date, description, category, version] rows."""
+        if not rows:
+            return
+        days = [to_day(row[1]) for row in rows]
+        date_texts = [row[1].encode("utf-8") if day == MISSING_DAY else b"" for row, day in zip(rows, days)]
+        non_iso = sum(1 for text in date_texts if text)
+        if non_iso:
+            count("non-ISO dates", non_iso)
+            logger.info("%d transactions have dates that are not yyyy-mm-dd; their text is kept as is.", non_iso)
+        columns = {
+            AMOUNTS: np.array([round(float(row[0]) * 100) for row in rows], dtype=np.int64),
+            DAYS: np.array(days, dtype=np.int32),
+            CATEGORIES: np.array([self._code("categories", row[3]) for row in rows], dtype=np.int32),
+            VERSIONS: np.array([self._code("versions", row[4]) for row in rows], dtype=np.int32),
+        }
+        self._save_dictionary()
+        self._append_text(OFFSETS, BLOB, [str(row[2]).encode("utf-8") for row in rows])
+        self._append_text(DATE_OFFSETS, DATE_BLOB, date_texts)
+        for name, values in columns.items():
+            with open(self.column_path(name), "ab") as file:
+                file.write(values.tobytes())
+        self._mapped = None
+
+    def _write_rows(self, start, rows):
+        self._append_columns(rows)
+
+    def _write_updates(self, indices):
+        self._write_codes(
+            indices, [self.categories[i] for i in indices], [self.category_versions[i] for i in indices]
+        )
+
+    def _write_codes(self, indices, categories, versions):
+        """Overwrites the category/version codes of the given rows in place."""
+        with self._lock:
+            category_codes = np.memmap(self.column_path(CATEGORIES), dtype=np.int32, mode="r+")
+            version_codes = np.memmap(self.column_path(VERSIONS), dtype=np.int32, mode="r+")
+            index = np.asarray(indices, dtype=np.int64)
+            category_codes[index] = [self._code("categories", category) for category in categories]
+            version_codes[index] = [self._code("versions", version) for version in versions]
+            self._save_dictionary()
+            category_codes.flush()
+            version_codes.flush()
+            del category_codes, version_codes
+            self._mapped = None
+
+    def compact(self):
+        """Nothing to fold: updates are written in place."""
+
+    def _in_range(self, days, start, end):
+        mask = np.ones(len(days), dtype=bool)
+        if start is not None:
+            mask &= days >= bound_day(start, upper=False)
+        if end is not None:
+            mask &= days <= bound_day(end, upper=True)
+        return mask
+
+    def totals(self, start=None, end=None):
+        arrays = self.arrays()
+        amounts = arrays[AMOUNTS][self._in_range(arrays[DAYS], start, end)]
+        income = int(amounts[amounts > 0].sum())
+        expense = -int(amounts[amounts <= 0].sum())
+        return income / 100, expense / 100
+
+    def category_totals(self, start=None, end=None):
+        self.backfill()
+        arrays = self.arrays()
+        mask = self._in_range(arrays[DAYS], start, end)
+        codes = arrays[CATEGORIES][mask]
+        sums = np.bincount(codes, weights=arrays[AMOUNTS][mask], minlength=len(self.dictionary["categories"]))
+        present = np.bincount(codes, minlength=len(sums)) > 0
+        return {
+            self.dictionary["categories"][code]: float(sums[code]) / 100 for code in np.flatnonzero(present)
+        }
+
+    def to_dataframe(self, names=("amount", "date", "description", "category")):
+        """DataFrame straight from the mapped columns (dates as datetime64, no string parsing)."""
+        import pandas as pd
+
+        self.backfill()
+        with self._lock:
+            arrays = self.arrays()
+            categories = np.array(self.dictionary["categories"] or [""], dtype=object)
+            dates = arrays[DAYS].astype("datetime64[D]")
+            dates[arrays[DAYS] == MISSING_DAY] = np.datetime64("NaT")
+            columns = (
+                arrays[AMOUNTS] / 100,
+                dates,
+                list(self.descriptions) if self.loaded else self._descriptions(arrays, 0, len(arrays[AMOUNTS])),
+                categories[arrays[CATEGORIES]] if len(arrays[CATEGORIES]) else np.array([], dtype=object),
+            )
+        return pd.DataFrame(dict(zip(names, columns)))
@@ -0,0 +1,252 @@
+import csv
+import hashlib
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from datetime import datetime
+
+from core.cache import normalize_description
+from core.instrumentation import count, span
+from core.store import get_store
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "ofx", "qif")
+HEADER_SCAN_ROWS = 30  # Bank CSVs often start with account details before the column header
+
+# Day-first formats are tried before month-first ones unless dayfirst=False
+DAY_FIRST_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%d/%m/%y", "%d-%m-%y")
+MONTH_FIRST_FORMATS = ("%m/%d/%Y", "%m-%d-%Y", "%m/%d/%y", "%m-%d-%y")
+UNAMBIGUOUS_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y%m%d", "%d %b %Y", "%d-%b-%Y", "%d %b %y", "%d-%b-%y",
+                       "%d %B %Y", "%b %d, %Y")
+
+# Normalized header names per column role, most specific first
+DATE_COLUMNS = ("transaction date", "txn date", "tran date", "date", "value date", "posting date", "posted date")
+DESCRIPTION_COLUMNS = ("description", "narration", "transaction details", "details", "particulars",
+                       "remarks", "payee", "name", "memo")
+AMOUNT_COLUMNS = ("amount", "transaction amount", "amount inr", "amt")
+DEBIT_COLUMNS = ("debit", "withdrawal", "withdrawal amt", "withdrawal amount", "debit amount", "dr")
+CREDIT_COLUMNS = ("credit", "deposit", "deposit amt", "deposit amount", "credit amount", "cr")
+
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.DOTALL | re.IGNORECASE)
+OFX_FIELD = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+
+def parse_date(text, dayfirst=True):
+    """yyyy-mm-dd for a statement date, or None if no known format matches."""
+    text = text.strip().replace("'", "/")
+    if len(text) > 8 and text[:8].isdigit():
+        text = text[:8]  # OFX timestamps: 20250512120000[+5.5:IST]
+    ambiguous = DAY_FIRST_FORMATS + MONTH_FIRST_FORMATS if dayfirst else MONTH_FIRST_FORMATS + DAY_FIRST_FORMATS
+    for date_format in UNAMBIGUOUS_FORMATS + ambiguous:
+        try:
+            return datetime.strptime(text, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(text):
+    """Float amount from "1,234.50", "₹ 1,234.50 Dr", "(200.00)", ...; None if empty or unreadable."""
+    text = text.strip()
+    if not text:
+        return None
+    sign = 1
+    upper = text.upper()
+    if upper.endswith("DR"):
+        sign, text = -1, text[:-2]
+    elif upper.endswith("CR"):
+        text = text[:-2]
+    if text.startswith("(") and text.endswith(")"):
+        sign, text = -sign, text[1:-1]
+    text = re.sub(r"[^\d.\-+]", "", text)
+    try:
+        return sign * float(text)
+    except ValueError:
+        return None
+
+
+def _header_key(name):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def _find_column(header, names):
+    for name in names:
+        if name in header:
+            return header.index(name)
+    return None
+
+
+def read_csv_statement(path, dayfirst=True):
+    """Yields (amount, date, description) from a bank CSV export.
+
+    The header row is found among the first rows by its column names;
+    amounts come from a signed amount column or from debit/credit columns.
+    """
+    with open(path, "r", newline="", encoding="utf-8-sig") as file:
+        rows = csv.reader(file)
+        columns = None
+        for scanned, row in enumerate(rows):
+            header = [_header_key(cell) for cell in row]
+            date_column = _find_column(header, DATE_COLUMNS)
+            description_column = _find_column(header, DESCRIPTION_COLUMNS)
+            amount_column = _find_column(header, AMOUNT_COLUMNS)
+            debit_column = _find_column(header, DEBIT_COLUMNS)
+            credit_column = _find_column(header, CREDIT_COLUMNS)
+            if date_column is not None and description_column is not None and (
+                    amount_column is not None or debit_column is not None or credit_column is not None):
+                columns = date_column, description_column, amount_column, debit_column, credit_column
+                break
+            if scanned >= HEADER_SCAN_ROWS:
+                break
+        if columns is None:
+            raise ValueError(f"{path}: no date/description/amount header found")
+
+        date_column, description_column, amount_column, debit_column, credit_column = columns
+
+        def cell(row, column):
+            return row[column] if column is not None and column < len(row) else ""
+
+        for row in rows:
+            if amount_column is not None:
+                amount = parse_amount(cell(row, amount_column))
+            else:
+                debit = parse_amount(cell(row, debit_column))
+                credit = parse_amount(cell(row, credit_column))
+                amount = None if debit is None and credit is None else (credit or 0.0) - abs(debit or 0.0)
+            yield amount, parse_date(cell(row, date_column), dayfirst), cell(row, description_column)
+
+
+def read_ofx_statement(path, dayfirst=True):
+    """Yields (amount, date, description) for every <STMTTRN> of an OFX (SGML or XML) file."""
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        text = file.read()
+    for match in OFX_TRANSACTION.finditer(text):
+        fields = {tag.upper(): value.strip() for tag, value in OFX_FIELD.findall(match.group(1))}
+        description = " ".join(part for part in (fields.get("NAME", ""), fields.get("MEMO", "")) if part)
+        yield (parse_amount(fields.get("TRNAMT", "")), parse_date(fields.get("DTPOSTED", ""), dayfirst),
+               description)
+
+
+def _qif_transaction(record, dayfirst):
+    description = " ".join(part for part in (record.get("P", ""), record.get("M", "")) if part)
+    return parse_amount(record.get("T", record.get("U", ""))), parse_date(record.get("D", ""), dayfirst), description
+
+
+def read_qif_statement(path, dayfirst=True):
+    """Yields (amount, date, description) per QIF record (D date, T/U amount, P payee, M memo, ^ end)."""
+    record = {}
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if not line or line.startswith("!"):
+                continue
+            code, value = line[0], line[1:].strip()
+            if code == "^":
+                if record:
+                    yield _qif_transaction(record, dayfirst)
+                record = {}
+            elif code in "DTUPM":
+                record.setdefault(code, value)
+    if record:
+        yield _qif_transaction(record, dayfirst)
+
+
+READERS = {"csv": read_csv_statement, "ofx": read_ofx_statement, "qif": read_qif_statement}
+
+
+def statement_format(path):
+    """"csv", "ofx" or "qif" from the file extension (.qfx is OFX)."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    extension = "ofx" if extension == "qfx" else extension
+    if extension not in READERS:
+        raise ValueError(f"{path}: unsupported statement format (expected one of {', '.join(FORMATS)})")
+    return extension
+
+
+def read_statement(path, file_format=None, dayfirst=True):
+    """Yields normalized [amount, date, description] rows; rows without a date or amount are counted and skipped."""
+    reader = READERS[file_format or statement_format(path)]
+    skipped = 0
+    for amount, date_text, description in reader(path, dayfirst):
+        if amount is None or date_text is None:
+            skipped += 1
+            continue
+        yield [amount, date_text, " ".join(description.split())]
+    if skipped:
+        count("statement rows skipped", skipped)
+        logger.info("%s: skipped %d rows without a date or amount.", path, skipped)
+
+
+def content_hash(amount, date_text, description):
+    """Identity of a transaction for de-duplication: amount in paise, date and normalized description."""
+    key = f"{round(float(amount) * 100)}|{date_text}|{normalize_description(description)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def existing_hashes(store, start, end):
+    """Multiset of content hashes of the ledger rows dated within [start, end]."""
+    hashes = Counter()
+    for chunk in store.iter_chunks():
+        for amount, date_text, description, _category, _version in chunk:
+            if start <= date_text <= end:
+                hashes[content_hash(amount, date_text, description)] += 1
+    return hashes
+
+
+def deduplicate(rows, known):
+    """Rows of one statement that known (a hash multiset, updated in place) does not already hold.
+
+    A statement can legitimately list the same purchase twice on one day,
+    so occurrences are counted: the n-th repeat of a transaction is new
+    only if the ledger (or an earlier statement in the batch) has fewer
+    than n. Re-importing an overlapping statement therefore adds nothing.
+    """
+    seen = Counter()
+    new_rows = []
+    for row in rows:
+        key = content_hash(*row)
+        seen[key] += 1
+        if seen[key] > known[key]:
+            new_rows.append(row)
+    for key, occurrences in seen.items():
+        known[key] = max(known[key], occurrences)
+    return new_rows
+
+
+def import_statements(paths, store=None, file_format=None, dayfirst=True):
+    """Imports bank statements into the ledger; returns (imported, duplicates).
+
+    Statements are parsed as a stream and de-duplicated against the
+    ledger rows in their date range (and against each other); the new
+    rows are categorized in batches by the store's registered categorizer
+    and appended with a single write, so listeners (views, budgets)
+    refresh once.
+    """
+    store = store or get_store()
+    with span("import"):
+        statements = [list(read_statement(path, file_format, dayfirst)) for path in paths]
+        dates = [row[1] for rows in statements for row in rows]
+        if not dates:
+            return 0, 0
+        with span("dedupe"):
+            known = existing_hashes(store, min(dates), max(dates))
+            new_rows = [row for rows in statements for row in deduplicate(rows, known)]
+        with span("write"):
+            store.extend(new_rows)
+    duplicates = len(dates) - len(new_rows)
+    count("rows imported", len(new_rows))
+    logger.info("Imported %d transactions from %d statements (%d duplicates skipped).",
+                len(new_rows), len(paths), duplicates)
+    return len(new_rows), duplicates
+
+
+if __name__ == "__main__":
+    # python -m core.importer statement.csv [more.ofx ...]; rows are categorized on the next launch
+    from core.log import configure_logging
+
+    configure_logging()
+    imported, duplicates = import_statements(sys.argv[1:])
+    print(f"Imported {imported} transactions ({duplicates} duplicates skipped).")
@@ -0,0 +1,186 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from core.settings import load_settings
+
+logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_FILE = "instrumentation.json"
+HISTORY_LIMIT = 20  # Sessions kept in the report file
+ROLLING_WINDOW = 256  # Latest durations per span used for the rolling percentiles
+# Histogram bucket upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class _NullSpan:
+    """What span() hands out while instrumentation is off: entering and leaving cost nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class SpanStats:
+    """Call count, total/max time, a fixed-bucket histogram and the latest durations of one span."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = deque(maxlen=ROLLING_WINDOW)
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self.buckets[next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))] += 1
+        self.recent.append(ms)
+
+    def report(self):
+        recent = sorted(self.recent)
+        histogram = {f"<={bound}": count for bound, count in zip(BUCKETS_MS, self.buckets) if count}
+        if self.buckets[-1]:
+            histogram[f">{BUCKETS_MS[-1]}"] = self.buckets[-1]
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0,
+            "max_ms": round(self.max, 3),
+            "recent_p50_ms": round(recent[len(recent) // 2], 3) if recent else 0,
+            "recent_p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 3) if recent else 0,
+            "histogram_ms": histogram,
+        }
+
+
+class _Span:
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        stack = self.instrumentation._stack()
+        self.path = f"{stack[-1]}/{self.name}" if stack else self.name
+        stack.append(self.path)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.instrumentation._stack().pop()
+        self.instrumentation.record(self.path, elapsed)
+        return False
+
+
+class Instrumentation:
+    """Nested timing spans and counters for one session.
+
+    A span is timed under its path ("store.backfill/categorizer.predict"), so the
+    same work is reported separately per caller; spans nest per thread.
+    Counters are plain totals (rows parsed, predictions made, cache hits).
+    Disabled, span() returns a shared no-op context manager and count()
+    returns at once, so instrumented code pays one attribute check.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.spans = {}  # Path -> SpanStats
+        self.counters = {}  # Name -> total
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name):
+        """Context manager timing the enclosed block under name."""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name, seconds):
+        """Adds one duration measured elsewhere (e.g. across threads) to a span."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self.spans.get(name)
+            if stats is None:
+                stats = self.spans[name] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "spans": {name: stats.report() for name, stats in sorted(self.spans.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def dump(self, path=INSTRUMENTATION_FILE):
+        """Appends this session's report to the report file; returns it (None when disabled)."""
+        if not self.enabled:
+            return None
+        report = self.report()
+        try:
+            with open(path, "r") as file:
+                history = json.load(file)
+        except (FileNotFoundError, ValueError):
+            history = []
+        history = (history + [report])[-HISTORY_LIMIT:]
+        try:
+            with open(path, "w") as file:
+                json.dump(history, file, indent=2)
+        except OSError as e:
+            logger.warning("Could not save instrumentation report: %s", e)
+        return report
+
+
+_instrumentation = None
+
+
+def get_instrumentation():
+    """Returns the shared instance, enabled by "instrumentation": true in settings.json."""
+    global _instrumentation
+    if _instrumentation is None:
+        _instrumentation = Instrumentation(enabled=bool(load_settings().get("instrumentation", False)))
+    return _instrumentation
+
+
+def span(name):
+    return (_instrumentation or get_instrumentation()).span(name)
+
+
+def count(name, n=1):
+    (_instrumentation or get_instrumentation()).count(name, n)
+
+
+def timed(name):
+    """Decorator: times every call of the function as a span."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
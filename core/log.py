@@ -0,0 +1,58 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from core.settings import load_settings
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+DEFAULT_LEVEL = "INFO"
+LOG_FILE_BYTES = 1_000_000  # Rotate the optional log file at this size
+LOG_FILE_BACKUPS = 3
+
+_listener = None
+
+
+def configure_logging(level=None, log_file=None):
+    """Sends every module's logger through a queue to one background thread that does the writing.
+
+    Callers on the GUI or worker threads only enqueue the record; the
+    listener thread formats it and writes to stderr (and a rotating log
+    file if given). The level and file default to "log_level" and
+    "log_file" in settings.json. Calling it again is a no-op.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+    settings = load_settings()
+    level = level or settings.get("log_level", DEFAULT_LEVEL)
+    log_file = log_file or settings.get("log_file")
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        try:
+            handlers.append(RotatingFileHandler(
+                log_file, maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8"
+            ))
+        except OSError as e:
+            logging.getLogger(__name__).warning("Could not open log file %s: %s", log_file, e)
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(records)]
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    _listener = QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Writes out queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,309 @@
+import csv
+import gzip
+import json
+import logging
+import lzma
+import os
+import re
+import shutil
+from datetime import date
+
+from core.instrumentation import count, span
+from core.store import MANUAL_VERSION, TRANSACTIONS_FILE, TransactionStore, parse_row
+
+logger = logging.getLogger(__name__)
+
+PARTITIONS_DIR = "transactions.partitions"
+MANIFEST = "manifest.json"
+UNDATED = "undated"  # Partition for rows whose date is not yyyy-mm-dd
+COMPRESSORS = {"gzip": (gzip.open, ".gz"), "lzma": (lzma.open, ".xz")}
+
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def partition_key(date_text):
+    """yyyy-mm for ISO dates, UNDATED otherwise."""
+    return date_text[:7] if ISO_DATE.fullmatch(date_text) else UNDATED
+
+
+class PartitionedTransactionStore(TransactionStore):
+    """TransactionStore split into one CSV file per month plus a manifest.
+
+    The manifest records each partition's file, row count and min/max
+    date. load() only reads the manifest: queries that name a date range
+    (totals, category_totals) open just the partitions overlapping it,
+    backfill and the rollups (the summary, the charts) read one partition
+    at a time, and the full history is only read the first time a caller
+    needs every row (the table, exports). Category updates rewrite only
+    the partitions they touch.
+
+    With compression set to "gzip" or "lzma", partitions of past months
+    are compressed on load; appends to them add a new compressed stream,
+    which both formats read back as one file.
+    """
+
+    def __init__(self, path=PARTITIONS_DIR, csv_path=TRANSACTIONS_FILE, compression=None):
+        super().__init__(path)
+        self.csv_path = csv_path
+        self.compression = compression if compression in COMPRESSORS else None
+        self.manifest = {}  # Partition key -> {"file", "rows", "min_date", "max_date"}
+        self.locations = []  # Row index -> partition key (valid once everything is loaded)
+        self.partition_indices = {}  # Partition key -> row indices, in file order
+        self._partition_cache = {}  # Partition key -> rows read for range queries
+
+    def open(self):
+        return self.load()
+
+    def load(self):
+        """Reads the manifest (splitting the CSV ledger into partitions the first time)."""
+        with self._lock:
+            if not os.path.isdir(self.path):
+                if os.path.exists(self.csv_path):
+                    self.split_csv()
+                else:
+                    os.makedirs(self.path)
+            try:
+                with open(self.partition_path(MANIFEST), "r") as file:
+                    self.manifest = json.load(file)
+            except FileNotFoundError:
+                self.manifest = {}
+            if self.compression:
+                self.compress_partitions()
+            self._partition_cache = {}
+            self.rollups = None
+            self.backfilled_version = None
+            self.loaded = False  # Rows are read on demand, see ensure_loaded()
+            self.version += 1
+        return self
+
+    def split_csv(self):
+        """Splits the CSV ledger into partitions in a temporary directory, renamed into place when done.
+
+        A split that fails leaves no partitions directory behind, so the
+        next launch splits again instead of showing an empty ledger.
+        """
+        temp_path = self.path + ".tmp"
+        shutil.rmtree(temp_path, ignore_errors=True)
+        os.makedirs(temp_path)
+        source = TransactionStore(self.csv_path).load()
+        split = PartitionedTransactionStore(temp_path, self.csv_path)
+        split._append_rows(list(zip(
+            source.amounts, source.dates, source.descriptions, source.categories, source.category_versions
+        )))
+        os.replace(temp_path, self.path)
+        logger.info("Split %d transactions into %d partitions.", len(source.amounts), len(split.manifest))
+
+    def ensure_loaded(self):
+        """Reads every partition, oldest month first; undated rows come last."""
+        if self.loaded:
+            return
+        with self._lock:
+            if self.loaded:
+                return
+            amounts, dates, descriptions, categories, category_versions = [], [], [], [], []
+            locations, partition_indices = [], {}
+            for key in sorted(self.manifest, key=lambda k: (k == UNDATED, k)):
+                rows = self.read_partition(key)
+                partition_indices[key] = list(range(len(amounts), len(amounts) + len(rows)))
+                locations.extend([key] * len(rows))
+                for amount, date_text, description, category, category_version in rows:
+                    amounts.append(amount)
+                    dates.append(date_text)
+                    descriptions.append(description)
+                    categories.append(category)
+                    category_versions.append(category_version)
+            self.amounts, self.dates, self.descriptions = amounts, dates, descriptions
+            self.categories, self.category_versions = categories, category_versions
+            self.locations, self.partition_indices = locations, partition_indices
+            self._partition_cache = {}
+            self.loaded = True
+
+    def row_count(self):
+        """Rows in the ledger, from the manifest unless everything is already loaded."""
+        if self.loaded:
+            return len(self.amounts)
+        return sum(entry["rows"] for entry in self.manifest.values())
+
+    def partition_path(self, name):
+        return os.path.join(self.path, name)
+
+    def _open(self, name, mode):
+        for opener, suffix in COMPRESSORS.values():
+            if name.endswith(suffix):
+                return opener(self.partition_path(name), mode + "t", newline="")
+        return open(self.partition_path(name), mode, newline="")
+
+    def read_partition(self, key, cache=True):
+        """[amount, date, description, category, version] rows of one partition."""
+        cached = self._partition_cache.get(key)
+        if cached is not None:
+            return cached
+        rows = []
+        entry = self.manifest.get(key)
+        if entry is not None:
+            with span("store.read_partition"), self._open(entry["file"], "r") as file:
+                rows = [row for row in map(parse_row, csv.reader(file)) if row is not None]
+            count("rows parsed", len(rows))
+        if cache:
+            self._partition_cache[key] = rows
+        return rows
+
+    def iter_chunks(self, chunk_rows=None):
+        """One partition at a time (uncached) unless everything is already in memory."""
+        if self.loaded:
+            yield from super().iter_chunks(chunk_rows)
+            return
+        for key in sorted(self.manifest, key=lambda k: (k == UNDATED, k)):
+            yield self.read_partition(key, cache=False)
+
+    def overlapping(self, start=None, end=None):
+        """Partition keys whose date span intersects [start, end] (None is open)."""
+        keys = []
+        for key, entry in self.manifest.items():
+            if key == UNDATED:
+                if start is None and end is None:
+                    keys.append(key)
+            elif (start is None or entry["max_date"] >= start) and (end is None or entry["min_date"] <= end):
+                keys.append(key)
+        return sorted(keys)
+
+    def _save_manifest(self):
+        temp_path = self.partition_path(MANIFEST) + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.manifest, file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.partition_path(MANIFEST))
+
+    def _append_rows(self, rows):
+        """Appends rows to their month partitions and updates the manifest."""
+        by_key = {}
+        for row in rows:
+            by_key.setdefault(partition_key(row[1]), []).append(row)
+        for key, key_rows in by_key.items():
+            entry = self.manifest.get(key)
+            if entry is None:
+                entry = self.manifest[key] = {"file": f"{key}.csv", "rows": 0, "min_date": None, "max_date": None}
+            with self._open(entry["file"], "a") as file:
+                csv.writer(file).writerows(key_rows)
+            dates = [row[1] for row in key_rows]
+            entry["rows"] += len(key_rows)
+            entry["min_date"] = min(dates + ([entry["min_date"]] if entry["min_date"] else []))
+            entry["max_date"] = max(dates + ([entry["max_date"]] if entry["max_date"] else []))
+            cached = self._partition_cache.get(key)
+            if cached is not None:
+                cached.extend([float(row[0]), *row[1:5]] for row in key_rows)
+        self._save_manifest()
+        return by_key
+
+    def _write_rows(self, start, rows):
+        self._append_rows(rows)
+        if self.loaded:
+            for offset, row in enumerate(rows):
+                key = partition_key(row[1])
+                self.locations.append(key)
+                self.partition_indices.setdefault(key, []).append(start + offset)
+
+    def _rewrite_partition(self, key, rows):
+        """Replaces one partition file atomically (temp file + rename)."""
+        name = self.manifest[key]["file"]
+        temp_name = "tmp-" + name  # Same suffix, so it gets the same compression
+        with self._open(temp_name, "w") as file:
+            csv.writer(file).writerows(rows)
+        os.replace(self.partition_path(temp_name), self.partition_path(name))
+
+    def _write_updates(self, indices):
+        """Rewrites each partition containing an updated row (one month, not the whole ledger)."""
+        for key in sorted({self.locations[i] for i in indices}):
+            self._rewrite_partition(key, [
+                [self.amounts[i], self.dates[i], self.descriptions[i], self.categories[i], self.category_versions[i]]
+                for i in self.partition_indices[key]
+            ])
+
+    def compact(self):
+        """Nothing to fold: updates rewrite their partitions directly."""
+
+    def compress_partitions(self):
+        """Compresses the partitions of months before the current one."""
+        extension = COMPRESSORS[self.compression][1]
+        current = date.today().strftime("%Y-%m")
+        changed = False
+        for key, entry in self.manifest.items():
+            if key == UNDATED or key >= current or entry["file"].endswith(extension):
+                continue
+            rows = self.read_partition(key)
+            old_file = entry["file"]
+            entry["file"] = f"{key}.csv{extension}"
+            self._rewrite_partition(key, rows)
+            os.remove(self.partition_path(old_file))
+            changed = True
+        if changed:
+            self._save_manifest()
+
+    def _range_rows(self, start, end):
+        """Rows dated within [start, end], reading only the overlapping partitions."""
+        for key in self.overlapping(start, end):
+            for row in self.read_partition(key):
+                if (start is None or row[1] >= start) and (end is None or row[1] <= end):
+                    yield row
+
+    def _stale_batches(self, current, keys=None):
+        """Per partition (all of them by default), ((key, its rows), its stale rows); one partition in memory at a time.
+
+        Partitions named in keys stay cached for the range query that follows.
+        """
+        for key in sorted(self.manifest, key=lambda k: (k == UNDATED, k)) if keys is None else keys:
+            rows = self.read_partition(key, cache=keys is not None)  # A cached partition is updated in place
+            stale = [row for row in rows if row[4] != current and row[4] != MANUAL_VERSION]
+            if stale:
+                yield (key, rows), stale
+
+    def _write_batch(self, keys, rows):
+        """The stale rows were updated in place: rewrite their partition."""
+        key, partition_rows = keys
+        self._rewrite_partition(key, partition_rows)
+
+    def _backfill_partitions(self, keys):
+        """Recategorizes stale rows of just these partitions (full history not loaded).
+
+        Returns the number updated; the caller notifies listeners once it
+        has released the lock.
+        """
+        current = self.categorizer_version
+        updated = 0
+        for batch, stale in self._stale_batches(current, keys):
+            for row, category in zip(stale, self.categorize([row[2] for row in stale])):
+                if self.rollups is not None:
+                    self.rollups.remove(row[0], row[1], row[3])
+                    self.rollups.add(row[0], row[1], category)
+                row[3], row[4] = category, current
+            self._write_batch(batch, stale)
+            updated += len(stale)
+        if updated:
+            count("rows recategorized", updated)
+            self.version += 1
+        return updated
+
+    def totals(self, start=None, end=None):
+        if self.loaded:
+            return super().totals(start, end)
+        income = expense = 0.0
+        with self._lock:
+            for row in self._range_rows(start, end):
+                if row[0] > 0:
+                    income += row[0]
+                else:
+                    expense -= row[0]
+        return income, expense
+
+    def category_totals(self, start=None, end=None):
+        if self.loaded:
+            return super().category_totals(start, end)
+        totals = {}
+        updated = 0
+        with self._lock:
+            if self.categorize is not None and self.backfilled_version != self.categorizer_version:
+                updated = self._backfill_partitions(self.overlapping(start, end))
+            for row in self._range_rows(start, end):
+                totals[row[3]] = totals.get(row[3], 0.0) + row[0]
+        if updated:
+            self._notify()
+        return totals
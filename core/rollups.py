@@ -0,0 +1,148 @@
+import json
+import os
+import re
+from datetime import date
+
+GRANULARITIES = ("day", "week", "month")
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def period_keys(date_text):
+    """(day, ISO week, month) keys of a yyyy-mm-dd date; empty strings for anything else."""
+    if not ISO_DATE.fullmatch(date_text):
+        return "", "", ""
+    try:
+        year, week, _weekday = date.fromisoformat(date_text).isocalendar()
+    except ValueError:
+        return "", "", ""
+    return date_text, f"{year}-W{week:02d}", date_text[:7]
+
+
+def week_label(week_key):
+    """ "2025-W20" -> "2025-05-12/2025-05-18", the label pandas gives a weekly period."""
+    year, week = week_key.split("-W")
+    monday = date.fromisocalendar(int(year), int(week), 1)
+    sunday = date.fromisocalendar(int(year), int(week), 7)
+    return f"{monday.isoformat()}/{sunday.isoformat()}"
+
+
+class Rollups:
+    """Income, expense and row count per (period, category) at day, ISO-week and month grain.
+
+    Amounts are kept in integer paise so adding and later removing a row
+    (a recategorization) restores the exact previous totals. Every update
+    is O(1); rebuild() recomputes everything from the ledger columns.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self.buckets = {granularity: {} for granularity in GRANULARITIES}
+        self.rows = 0
+        self.categorized = None  # Categorizer version every counted row is known to carry, if any
+        self._keys = {}  # date text -> period keys, dates repeat a lot
+
+    def _period_keys(self, date_text):
+        keys = self._keys.get(date_text)
+        if keys is None:
+            keys = self._keys[date_text] = period_keys(date_text)
+        return keys
+
+    def add(self, amount, date_text, category, direction=1):
+        """Counts one row in; direction=-1 takes it back out."""
+        paise = round(amount * 100)
+        income, expense = (paise, 0) if paise > 0 else (0, -paise)
+        self.add_totals(date_text, category, direction * income, direction * expense, direction)
+
+    def add_totals(self, date_text, category, income, expense, rows):
+        """Counts rows already summed into income and expense paise for one date and category."""
+        for granularity, period in zip(GRANULARITIES, self._period_keys(date_text)):
+            bucket = self.buckets[granularity]
+            key = (period, category)
+            totals = bucket.get(key)
+            if totals is None:
+                totals = bucket[key] = [0, 0, 0]
+            totals[0] += income
+            totals[1] += expense
+            totals[2] += rows
+            if not totals[2]:
+                del bucket[key]
+        self.rows += rows
+
+    def remove(self, amount, date_text, category):
+        self.add(amount, date_text, category, direction=-1)
+
+    def rebuild(self, amounts, dates, categories):
+        """Recounts every row from scratch; nothing derived from earlier rows survives."""
+        self._reset()
+        for amount, date_text, category in zip(amounts, dates, categories):
+            self.add(amount, date_text, category)
+        return self
+
+    def summary(self):
+        """(income, expense, absolute total per category, row count per category), like the Dashboard shows."""
+        income = expense = 0
+        category_totals, category_counts = {}, {}
+        for (_month, category), (row_income, row_expense, count) in self.buckets["month"].items():
+            income += row_income
+            expense += row_expense
+            category_totals[category] = category_totals.get(category, 0) + row_income + row_expense
+            category_counts[category] = category_counts.get(category, 0) + count
+        return (income / 100, expense / 100,
+                {category: total / 100 for category, total in category_totals.items()}, category_counts)
+
+    def expenses(self, granularity=None, by_category=False):
+        """Expense totals (positive rupees), sorted by key.
+
+        granularity=None gives {category: total}; otherwise {period: total},
+        or {(period, category): total} with by_category.
+        """
+        totals = {}
+        for (period, category), (_income, expense, _count) in self.buckets[granularity or "month"].items():
+            if not expense or (granularity and not period):
+                continue
+            if granularity is None:
+                key = category
+            else:
+                key = (period, category) if by_category else period
+            totals[key] = totals.get(key, 0) + expense
+        return {key: totals[key] / 100 for key in sorted(totals)}
+
+    def net(self, period, granularity="month"):
+        """Net amount (income minus expense, rupees) per category within one period, e.g. a "yyyy-mm" month."""
+        totals = {}
+        for (key, category), (income, expense, _count) in self.buckets[granularity].items():
+            if key == period:
+                totals[category] = (income - expense) / 100
+        return totals
+
+    def save(self, path):
+        """Writes the rollups atomically, with the ledger row count they cover."""
+        payload = {
+            "rows": self.rows,
+            "categorized": self.categorized,
+            "buckets": {
+                granularity: [[period, category, *totals] for (period, category), totals in bucket.items()]
+                for granularity, bucket in self.buckets.items()
+            },
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w") as file:
+            json.dump(payload, file)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads saved rollups; raises OSError/ValueError/KeyError if missing or unreadable."""
+        with open(path, "r") as file:
+            payload = json.load(file)
+        rollups = cls()
+        for granularity in GRANULARITIES:
+            rollups.buckets[granularity] = {
+                (period, category): [income, expense, count]
+                for period, category, income, expense, count in payload["buckets"][granularity]
+            }
+        rollups.rows = payload["rows"]
+        rollups.categorized = payload.get("categorized")
+        return rollups
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from collections import deque
+
+RULES_FILE = "rules.json"  # Optional user/merchant rules, see RuleEngine.load_file
+
+DEFAULT_RULES = {
+    "Food": ["pizza", "burger", "restaurant", "cafe", "restaurant food", "groceries", "snacks", "icecream", "coffee"],
+    "Transport": ["uber ride", "bus", "train", "taxi", "fuel", "ola ride", "uber"],
+    "Entertainment": ["netflix", "cinema", "movie", "concert", "game", "checking out", "trip"],
+    "Shopping": ["amazon", "mall", "clothing", "electronics", "flipkart headphones", "groceries", "flipkart order"],
+    "Utilities": ["electricity", "water", "internet", "gas", "rent", "laundry"],
+    "Stationary": ["pen", "notebooks", "printer paper", "internet subscription"],
+}
+
+# Descriptions that already are a category name are kept as-is
+KNOWN_CATEGORIES = {
+    "food", "transport", "entertainment", "shopping", "utilities", "stationary", "income", "other"
+}
+
+USER_RULE_PRIORITY = -1  # User rules beat the built-in table unless they say otherwise
+
+
+def canonical_category(name, categories=()):
+    """The stored spelling of a typed category name: "food " -> "Food".
+
+    A case-insensitive match among categories (e.g. the budget keys) wins,
+    then the known category names; anything else is kept, whitespace-trimmed.
+    """
+    text = " ".join(str(name).split())
+    for category in categories:
+        if category.lower() == text.lower():
+            return category
+    if text.lower() in KNOWN_CATEGORIES:
+        return text.capitalize()
+    return text
+
+
+class RuleEngine:
+    """Keyword -> category matcher compiled into a single Aho-Corasick automaton.
+
+    Every keyword is a case-insensitive substring rule with a priority;
+    the lowest priority among all keywords found in a description wins,
+    ties going to the rule added first. Matching walks each description
+    once, so its cost does not depend on how many rules are loaded.
+    """
+
+    def __init__(self, default="Other"):
+        self.default = default
+        self._rules = []  # (priority, sequence, keyword, category)
+        self._compiled = False
+
+    @classmethod
+    def with_defaults(cls, rules_file=RULES_FILE):
+        """Built-in table (priority = category position) plus the optional user rules file."""
+        engine = cls()
+        engine.add_rules(DEFAULT_RULES)
+        if rules_file and os.path.exists(rules_file):
+            engine.load_file(rules_file)
+        return engine
+
+    def __len__(self):
+        return len(self._rules)
+
+    def add_rule(self, keyword, category, priority=0):
+        keyword = keyword.strip().lower()
+        if not keyword:
+            return
+        self._rules.append((priority, len(self._rules), keyword, category))
+        self._compiled = False
+
+    def add_rules(self, rules, base_priority=0):
+        """Adds a {category: [keywords]} table; earlier categories take precedence."""
+        for position, (category, keywords) in enumerate(rules.items()):
+            for keyword in keywords:
+                self.add_rule(keyword, category, base_priority + position)
+
+    def load_file(self, path):
+        """Loads rules from JSON: a {category: [keywords]} table or a list of
+        {"keyword", "category", "priority"} objects."""
+        with open(path, "r") as file:
+            data = json.load(file)
+        if isinstance(data, dict):
+            self.add_rules(data, base_priority=USER_RULE_PRIORITY - len(data))
+        else:
+            for rule in data:
+                self.add_rule(rule["keyword"], rule["category"], rule.get("priority", USER_RULE_PRIORITY))
+
+    @property
+    def version(self):
+        """Short hash of the rule set, used to tag persisted categories."""
+        payload = json.dumps(
+            [[(priority, keyword, category) for priority, _sequence, keyword, category in sorted(self._rules)],
+             sorted(KNOWN_CATEGORIES)]
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:8]
+
+    def compile(self):
+        """Builds the trie, failure links and per-state best rule."""
+        ranked = sorted(self._rules)
+        self._categories = [rule[3] for rule in ranked]
+        goto = [{}]
+        best = [len(ranked)]  # len(ranked) means "no rule ends here"
+
+        for rank, (_priority, _sequence, keyword, _category) in enumerate(ranked):
+            state = 0
+            for char in keyword:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    best.append(len(ranked))
+                state = next_state
+            best[state] = min(best[state], rank)
+
+        # Breadth-first pass: failure links, and fold each state's suffix matches into best
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                best[next_state] = min(best[next_state], best[fail[next_state]])
+                queue.append(next_state)
+
+        self._goto, self._fail, self._best = goto, fail, best
+        self._no_match = len(ranked)
+        self._compiled = True
+
+    def match(self, description):
+        """Returns the winning category for a lowercased description, or the default."""
+        if not self._compiled:
+            self.compile()
+        goto, fail, best = self._goto, self._fail, self._best
+        found = self._no_match
+        state = 0
+        for char in description:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if best[state] < found:
+                found = best[state]
+                if found == 0:
+                    break
+        return self._categories[found] if found < self._no_match else self.default
+
+    def categorize(self, description):
+        """Known category names pass through; anything else goes to keyword matching."""
+        text = " ".join(str(description).lower().split())
+        if text in KNOWN_CATEGORIES:
+            return text.capitalize()
+        return self.match(text)
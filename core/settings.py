@@ -0,0 +1,24 @@
+import json
+import os
+
+SETTINGS_FILE = "settings.json"
+
+
+def load_settings():
+    """settings.json as a dict (theme, budgets, storage backend, ...); empty if missing or unreadable."""
+    try:
+        with open(SETTINGS_FILE, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_settings(**values):
+    """Merges values into settings.json, keeping every other key, and writes it atomically."""
+    settings = load_settings()
+    settings.update(values)
+    temp_path = SETTINGS_FILE + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump(settings, file)
+    os.replace(temp_path, SETTINGS_FILE)
+    return settings
@@ -0,0 +1,225 @@
+import logging
+import os
+import sqlite3
+import sys
+
+from core.instrumentation import count, span
+from core.store import DEFAULT_CHUNK_ROWS, MANUAL_VERSION, TRANSACTIONS_FILE, TransactionStore
+
+logger = logging.getLogger(__name__)
+
+DATABASE_FILE = "transactions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    amount REAL NOT NULL,
+    date TEXT NOT NULL,
+    description TEXT NOT NULL,
+    category TEXT NOT NULL DEFAULT '',
+    category_version TEXT NOT NULL DEFAULT ''
+);
+"""
+
+INDEXES = """
+-- Covering index: date-range totals and per-category group-bys never touch the table
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date, category, amount);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date);
+CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount);
+"""
+
+
+def connect(path=DATABASE_FILE, indexes=True):
+    """Opens the ledger database in WAL mode, creating the schema (and indexes) if needed."""
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    if indexes:
+        connection.executescript(INDEXES)
+    return connection
+
+
+def migrate_csv(csv_path=TRANSACTIONS_FILE, db_path=DATABASE_FILE):
+    """One-shot copy of the CSV ledger (journal included) into an empty database.
+
+    Returns the number of rows copied; a database that already has rows is
+    left untouched. Indexes are built after the bulk insert, which is
+    several times faster than maintaining them row by row.
+    """
+    connection = connect(db_path, indexes=False)
+    try:
+        if connection.execute("SELECT EXISTS (SELECT 1 FROM transactions)").fetchone()[0]:
+            return 0
+        source = TransactionStore(csv_path).load()
+        with connection:
+            connection.executemany(
+                "INSERT INTO transactions (id, amount, date, description, category, category_version) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                zip(range(1, len(source.amounts) + 1), source.amounts, source.dates, source.descriptions,
+                    source.categories, source.category_versions)
+            )
+        connection.executescript(INDEXES)
+        return len(source.amounts)
+    finally:
+        connection.close()
+
+
+class SQLiteTransactionStore(TransactionStore):
+    """TransactionStore persisted in SQLite instead of the CSV ledger.
+
+    Memory holds the columns the pages read once one of them needs every
+    row; until then backfill, the rollups and date-range / per-category
+    totals are answered by (indexed) SQL in batches, without reading the
+    table into Python. Writes go to the database in one transaction per
+    call. Row i in memory is the row with id i + 1.
+    """
+
+    def __init__(self, path=DATABASE_FILE, csv_path=TRANSACTIONS_FILE):
+        super().__init__(path)
+        self.csv_path = csv_path
+        self.connection = None
+
+    def _connect(self):
+        if self.connection is None:
+            if not os.path.exists(self.path) and os.path.exists(self.csv_path):
+                logger.info("Migrated %d transactions to %s.", migrate_csv(self.csv_path, self.path), self.path)
+            self.connection = connect(self.path)
+
+    def open(self):
+        """Connects, migrating the CSV ledger the first time; rows are read on first need."""
+        self._connect()
+        return self
+
+    def load(self):
+        """(Re)reads the database in batches of DEFAULT_CHUNK_ROWS."""
+        self._connect()
+        with self._lock, span("store.load"):
+            cursor = self.connection.execute(
+                "SELECT amount, date, description, category, category_version FROM transactions ORDER BY id"
+            )
+            columns = [[], [], [], [], []]
+            while True:
+                rows = cursor.fetchmany(DEFAULT_CHUNK_ROWS)
+                if not rows:
+                    break
+                for column, values in zip(columns, zip(*rows)):
+                    column.extend(values)
+            count("rows parsed", len(columns[0]))
+            self.amounts, self.dates, self.descriptions, self.categories, self.category_versions = columns
+            self.rollups = None
+            self.loaded = True
+            self.backfilled_version = None
+            self.version += 1
+        return self
+
+    def row_count(self):
+        if self.loaded:
+            return len(self.amounts)
+        with self._lock:
+            return self.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def _batches(self, where, params, chunk_rows):
+        """Yields [[id, amount, date, description, category, version], ...] in id order, chunk_rows at a time.
+
+        Each batch is its own keyset query, so writes between batches
+        (backfill updates) never disturb an open cursor.
+        """
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self.connection.execute(
+                    "SELECT id, amount, date, description, category, category_version FROM transactions "
+                    "WHERE id > ?" + where + " ORDER BY id LIMIT ?", (last_id, *params, chunk_rows)
+                ).fetchall()
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [list(row) for row in rows]
+
+    def iter_chunks(self, chunk_rows=None):
+        """Batches of rows straight from the table unless everything is already in memory."""
+        if self.loaded:
+            yield from super().iter_chunks(chunk_rows)
+            return
+        for rows in self._batches("", (), chunk_rows or DEFAULT_CHUNK_ROWS):
+            yield [row[1:] for row in rows]
+
+    def _stale_batches(self, current):
+        """Stale rows selected in SQL, by id."""
+        for rows in self._batches(" AND category_version NOT IN (?, ?)", (current, MANUAL_VERSION), DEFAULT_CHUNK_ROWS):
+            yield [row[0] for row in rows], [row[1:] for row in rows]
+
+    def _write_batch(self, keys, rows):
+        with self._lock, self.connection:
+            self.connection.executemany(
+                "UPDATE transactions SET category = ?, category_version = ? WHERE id = ?",
+                ((row[3], row[4], row_id) for row_id, row in zip(keys, rows))
+            )
+
+    def _write_rows(self, start, rows):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO transactions (id, amount, date, description, category, category_version) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((start + offset + 1, float(row[0]), *row[1:5]) for offset, row in enumerate(rows))
+            )
+
+    def _write_updates(self, indices):
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE transactions SET category = ?, category_version = ? WHERE id = ?",
+                ((self.categories[i], self.category_versions[i], i + 1) for i in indices)
+            )
+
+    def compact(self):
+        """Nothing to fold: updates are written in place."""
+
+    def _ledger_files(self):
+        """The database, and its WAL while that holds uncheckpointed writes (connecting creates it empty)."""
+        wal_path = self.path + "-wal"
+        if os.path.exists(wal_path) and os.path.getsize(wal_path):
+            return [self.path, wal_path]
+        return [self.path]
+
+    def flush(self):
+        """Checkpoints the WAL first, so closing the connection does not touch the database after the rollups."""
+        if self.connection is not None:
+            with self._lock:
+                self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        super().flush()
+
+    def _date_filter(self, start, end):
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def totals(self, start=None, end=None):
+        self._connect()
+        where, params = self._date_filter(start, end)
+        with self._lock:
+            income, expense = self.connection.execute(
+                "SELECT TOTAL(CASE WHEN amount > 0 THEN amount END), TOTAL(CASE WHEN amount <= 0 THEN -amount END) "
+                "FROM transactions" + where, params
+            ).fetchone()
+        return income, expense
+
+    def category_totals(self, start=None, end=None):
+        self._connect()
+        self.backfill()
+        where, params = self._date_filter(start, end)
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT category, TOTAL(amount) FROM transactions" + where + " GROUP BY category", params
+            ).fetchall()
+        return dict(rows)
+
+
+if __name__ == "__main__":
+    # python -m core.sqlite_store [transactions.csv] [transactions.db]
+    print(f"Migrated {migrate_csv(*sys.argv[1:3])} transactions.")
@@ -0,0 +1,55 @@
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+STARTUP_TIMINGS_FILE = "startup_timings.json"
+HISTORY_LIMIT = 50  # Launches kept in the timings file
+
+
+class StartupTimer:
+    """Splits the time from process start to the first painted frame into named phases."""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []  # (name, seconds)
+        self.finished = False
+
+    def mark(self, name):
+        """Closes the phase that started at the previous mark."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        return {
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "time_to_first_paint_ms": round((self.last - self.start) * 1000, 1),
+            "phases_ms": {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+        }
+
+    def finish(self, path=STARTUP_TIMINGS_FILE):
+        """Marks first paint, prints the breakdown and appends it to the timings history."""
+        if self.finished:
+            return None
+        self.finished = True
+        self.mark("first paint")
+        report = self.report()
+        logger.info("Startup: %s | time to first paint %sms",
+                    ", ".join(f"{name} {ms}ms" for name, ms in report["phases_ms"].items()),
+                    report["time_to_first_paint_ms"])
+
+        try:
+            with open(path, "r") as file:
+                history = json.load(file)
+        except (FileNotFoundError, ValueError):
+            history = []
+        history = (history + [report])[-HISTORY_LIMIT:]
+        try:
+            with open(path, "w") as file:
+                json.dump(history, file, indent=2)
+        except OSError as e:
+            logger.warning("Could not save startup timings: %s", e)
+        return report
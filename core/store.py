@@ -0,0 +1,660 @@
+import csv
+import locale
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.instrumentation import count, span
+from core.rollups import Rollups
+from core.settings import load_settings
+
+logger = logging.getLogger(__name__)
+
+TRANSACTIONS_FILE = "transactions.csv"
+JOURNAL_SUFFIX = ".journal"  # Category updates waiting to be folded into the ledger
+ROLLUPS_SUFFIX = ".rollups.json"  # Day/week/month x category totals, saved next to the ledger
+COMPACT_THRESHOLD = 1000  # Journal records that trigger a background compaction
+MANUAL_VERSION = "manual"  # Category tag for rows the user labelled by hand
+DEFAULT_CHUNK_ROWS = 50_000  # Rows per chunk when streaming the ledger
+
+
+def parse_row(row):
+    """A ledger CSV row as [amount, date, description, category, version], or None if malformed."""
+    if len(row) < 3:
+        return None
+    try:
+        amount = float(row[0])
+    except ValueError:
+        return None
+    return [amount, row[1], row[2], row[3] if len(row) > 3 else "", row[4] if len(row) > 4 else ""]
+
+
+def read_lines(path, size):
+    """Text lines of the first size bytes of a file, decoded as open() in text mode would."""
+    encoding = locale.getpreferredencoding(False)
+    with open(path, "rb") as file:
+        for line in file:
+            if len(line) > size:
+                return
+            size -= len(line)
+            yield line.decode(encoding)
+
+
+def read_journal(path, size=None):
+    """({row index: (category, version)}, record count) from a category journal; later records win.
+
+    A torn last line (crash mid-write) is ignored. With size, only the
+    first size bytes are read (the journal as it was at a snapshot).
+    """
+    updates, records = {}, 0
+    try:
+        for row in csv.reader(read_lines(path, os.path.getsize(path) if size is None else size)):
+            if len(row) < 3:
+                continue
+            records += 1
+            try:
+                updates[int(row[0])] = (row[1], row[2])
+            except ValueError:
+                continue
+    except FileNotFoundError:
+        pass
+    return updates, records
+
+
+class TransactionStore:
+    """Process-wide, in-memory copy of transactions.csv.
+
+    The file is parsed once; every page queries this store instead of
+    re-reading the CSV, and every append goes through it so memory and
+    disk never drift apart.
+
+    Rows are stored as amount,date,description[,category,category_version].
+    The category columns hold the resolved category and the tag of the
+    model/rule set that produced it; rows whose tag differs from the
+    registered categorizer's are stale and get recategorized in bulk by
+    backfill(). Rows the user labelled themselves carry MANUAL_VERSION and
+    are never recategorized.
+
+    The ledger is append-only on the hot path: new rows are appended, and
+    recategorizations are appended to a journal (row,category,version)
+    that load() replays. Once the journal grows past COMPACT_THRESHOLD a
+    background compaction folds it into the ledger with an atomic rename,
+    so reading or viewing data never rewrites the file.
+
+    Day/ISO-week/month x category rollups (core.rollups) are kept current
+    on every write and serve the Dashboard totals and the charts. They are
+    saved next to the ledger on flush() and after a backfill, and rebuilt
+    from the rows when the saved copy is older than the ledger.
+
+    Rows are read into memory only when a caller needs all of them (the
+    table, exports, appends). Until then backfill, the rollups, totals and
+    compaction stream the file in chunks of DEFAULT_CHUNK_ROWS
+    (core.streaming), so summaries and charts run in bounded memory.
+    """
+
+    def __init__(self, path=TRANSACTIONS_FILE):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.journal_records = 0
+        self.rollups_path = path + ROLLUPS_SUFFIX
+        self.rollups = None  # Built on first use, then updated by every write
+        self.amounts = []
+        self.dates = []
+        self.descriptions = []
+        self.categories = []
+        self.category_versions = []
+        self.version = 0  # Bumped on every write, lets views skip stale work
+        self.last_append = None  # (version, amount, date, category) of the latest append
+        self.loaded = False
+        self.categorize = None
+        self.categorizer_version = None
+        self.backfilled_version = None  # Categorizer version every row is known to carry while not loaded
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._compactor = ThreadPoolExecutor(max_workers=1)
+        self._pending_compaction = None
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.amounts)
+
+    def row_count(self):
+        """Rows in the ledger, or None while they are not loaded (counting would mean reading the file)."""
+        return len(self.amounts) if self.loaded else None
+
+    def data_key(self):
+        """Changes whenever what views show could change: any write, or a new categorizer."""
+        return self.version, self.categorizer_version
+
+    def open(self):
+        """Prepares the store for queries; the rows themselves are read on first need (see ensure_loaded)."""
+        return self
+
+    def load(self):
+        """(Re)reads the CSV from disk, skipping malformed rows."""
+        amounts, dates, descriptions, categories, category_versions = [], [], [], [], []
+        with span("store.load"):
+            try:
+                with open(self.path, "r", newline="") as file:
+                    for row in csv.reader(file):
+                        row = parse_row(row)
+                        if row is None:
+                            continue
+                        amounts.append(row[0])
+                        dates.append(row[1])
+                        descriptions.append(row[2])
+                        categories.append(row[3])
+                        category_versions.append(row[4])
+            except FileNotFoundError:
+                logger.info("%s not found. Starting with an empty ledger.", self.path)
+
+            journal_records = self._replay_journal(categories, category_versions)
+        count("rows parsed", len(amounts))
+
+        with self._lock:
+            self.amounts, self.dates, self.descriptions = amounts, dates, descriptions
+            self.categories, self.category_versions = categories, category_versions
+            self.journal_records = journal_records
+            self.rollups = None
+            self.loaded = True
+            self.backfilled_version = None
+            self.version += 1
+        return self
+
+    def _replay_journal(self, categories, category_versions):
+        """Applies journalled category updates; returns the number of journal records."""
+        updates, records = read_journal(self.journal_path)
+        for index, (category, category_version) in updates.items():
+            if 0 <= index < len(categories):
+                categories[index] = category
+                category_versions[index] = category_version
+        return records
+
+    def ensure_loaded(self):
+        """Reads every row into memory the first time a caller needs them."""
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                version = self.version
+                self.load()
+                self.version = version  # The same data views already saw streamed: nothing to redo
+
+    def set_categorizer(self, categorize, version):
+        """Registers categorize(descriptions) -> categories and the version tag it stamps on rows."""
+        self.categorize = categorize
+        self.categorizer_version = version
+
+    def append(self, transaction, category=None):
+        """Appends one [amount, date, description] row to disk, and to memory if the rows are loaded.
+
+        A given category is stored as a manual label; otherwise the
+        registered categorizer resolves it on write. Returns the stored
+        category.
+        """
+        amount = float(transaction[0])
+        category, category_version = self._resolve_category(transaction, category)
+        with self._lock:
+            self._add_rows([list(transaction[:3]) + [category, category_version]])
+            self.last_append = (self.version, amount, transaction[1], category)
+        self._notify()
+        return category
+
+    def extend(self, transactions, categories=None):
+        """Appends many [amount, date, description] rows with one write and one notification.
+
+        categories, if given, has one entry per row: a category is stored
+        as a manual label, None lets the categorizer decide. Returns the
+        stored categories.
+        """
+        rows = self._resolve_categories(transactions, categories)
+        if not rows:
+            return []
+        with self._lock:
+            self._add_rows(rows)
+        self._notify()
+        return [row[3] for row in rows]
+
+    def _add_rows(self, rows):
+        """Writes new rows and folds them into the rollups; the lists only grow once they are loaded.
+
+        An unloaded store never reads the ledger to append to it: the rows
+        are on disk, and the first load or stream picks them up from there.
+        """
+        self._write_rows(self.row_count(), rows)
+        if self.loaded:
+            for amount, date_text, description, category, category_version in rows:
+                self.amounts.append(float(amount))
+                self.dates.append(date_text)
+                self.descriptions.append(description)
+                self.categories.append(category)
+                self.category_versions.append(category_version)
+        if self.rollups is not None:
+            for amount, date_text, _description, category, _version in rows:
+                self.rollups.add(float(amount), date_text, category)
+        self.version += 1
+
+    def _resolve_category(self, transaction, category):
+        """(category, version tag) to store with a new row."""
+        if category is not None:
+            return category, MANUAL_VERSION
+        if self.categorize is not None:
+            return self.categorize([transaction[2]])[0], self.categorizer_version
+        self._uncategorized_written()
+        return "", ""
+
+    def _resolve_categories(self, transactions, categories=None):
+        """[amount, date, description, category, version] rows, categorizing unlabelled ones in batches."""
+        rows = [[float(transaction[0]), transaction[1], transaction[2], "", ""] for transaction in transactions]
+        pending = []
+        for i, row in enumerate(rows):
+            if categories is not None and categories[i] is not None:
+                row[3], row[4] = categories[i], MANUAL_VERSION
+            else:
+                pending.append(i)
+        if self.categorize is not None:
+            for start in range(0, len(pending), DEFAULT_CHUNK_ROWS):
+                batch = pending[start:start + DEFAULT_CHUNK_ROWS]
+                for i, category in zip(batch, self.categorize([rows[i][2] for i in batch])):
+                    rows[i][3], rows[i][4] = category, self.categorizer_version
+        elif pending:
+            self._uncategorized_written()
+        return rows
+
+    def _uncategorized_written(self):
+        """Rows are being stored without a category: the next backfill has to scan for them."""
+        with self._lock:
+            self.backfilled_version = None
+            if self.rollups is not None:
+                self.rollups.categorized = None
+
+    def _write_rows(self, start, rows):
+        """Persists new [amount, date, description, category, version] rows.
+
+        start is the first row's index, from row_count(): None for an
+        unloaded CSV ledger, which appends without needing it.
+        """
+        with open(self.path, "a", newline="") as file:
+            csv.writer(file).writerows(rows)
+
+    def stale_indices(self):
+        """Indices of rows whose category was not produced by the current categorizer."""
+        self.ensure_loaded()
+        current = self.categorizer_version
+        return [i for i, tag in enumerate(self.category_versions) if tag != current and tag != MANUAL_VERSION]
+
+    def backfill(self):
+        """Recategorizes stale rows in one batch and persists them. Returns the number updated."""
+        if self.categorize is None:
+            return 0
+        if not self.loaded:
+            return self._backfill_chunks()
+        with self._lock, span("store.backfill"):
+            stale = self.stale_indices()
+            if not stale:
+                return 0
+            new_categories = self.categorize([self.descriptions[i] for i in stale])
+            count("rows recategorized", len(stale))
+            for i, category in zip(stale, new_categories):
+                if self.rollups is not None:
+                    self.rollups.remove(self.amounts[i], self.dates[i], self.categories[i])
+                    self.rollups.add(self.amounts[i], self.dates[i], category)
+                self.categories[i] = category
+                self.category_versions[i] = self.categorizer_version
+            self._write_updates(stale)
+            self.save_rollups()
+            self.version += 1
+        self._notify()
+        return len(stale)
+
+    def _backfill_chunks(self):
+        """backfill() without loading the ledger: stale rows are recategorized and persisted batch by batch.
+
+        Once a pass leaves every row current, that is noted (in memory and
+        in the saved rollups), so later calls, and the next session, skip
+        the scan until the categorizer changes.
+        """
+        with self._lock, span("store.backfill"):
+            current = self.categorizer_version
+            rollups = self.ensure_rollups()
+            if self.backfilled_version == current or rollups.categorized == current:
+                self.backfilled_version = current
+                return 0
+            updated = 0
+            for keys, rows in self._stale_batches(current):
+                for row, category in zip(rows, self.categorize([row[2] for row in rows])):
+                    rollups.remove(row[0], row[1], row[3])
+                    rollups.add(row[0], row[1], category)
+                    row[3], row[4] = category, current
+                self._write_batch(keys, rows)
+                updated += len(rows)
+            self.backfilled_version = rollups.categorized = current
+            self.save_rollups()
+            if not updated:
+                return 0
+            count("rows recategorized", updated)
+            self.version += 1
+            if self.journal_records >= COMPACT_THRESHOLD:
+                self.schedule_compaction()
+        self._notify()
+        return updated
+
+    def _stale_batches(self, current):
+        """Yields (row indices, rows) of the stale rows in each chunk of the (not loaded) ledger."""
+        index = 0
+        for chunk in self.iter_chunks():
+            stale = [offset for offset, row in enumerate(chunk) if row[4] != current and row[4] != MANUAL_VERSION]
+            if stale:
+                yield [index + offset for offset in stale], [chunk[offset] for offset in stale]
+            index += len(chunk)
+
+    def _write_batch(self, keys, rows):
+        """Persists one recategorized batch from _stale_batches: journal records by row index."""
+        with open(self.journal_path, "a", newline="") as file:
+            csv.writer(file).writerows((i, row[3], row[4]) for i, row in zip(keys, rows))
+        self.journal_records += len(rows)
+
+    def _write_updates(self, indices):
+        """Persists the (already updated in memory) categories of the given rows."""
+        with open(self.journal_path, "a", newline="") as file:
+            csv.writer(file).writerows((i, self.categories[i], self.category_versions[i]) for i in indices)
+        self.journal_records += len(indices)
+        if self.journal_records >= COMPACT_THRESHOLD:
+            self.schedule_compaction()
+
+    def schedule_compaction(self):
+        """Folds the journal into the ledger on a background thread (at most one queued)."""
+        with self._lock:
+            if self._pending_compaction is None or self._pending_compaction.done():
+                self._pending_compaction = self._compactor.submit(self.compact)
+
+    def compact(self):
+        """Rewrites the ledger with journalled categories folded in, then drops the journal.
+
+        The bulk write runs outside the lock from a snapshot; rows appended
+        and updates journalled meanwhile are carried over before the atomic
+        renames, so concurrent writers never lose data.
+        """
+        if not self.loaded:
+            self._compact_chunks()
+            return
+        with self._lock:
+            if not self.journal_records:
+                return
+            rows, journal_size = len(self.amounts), os.path.getsize(self.journal_path)
+            columns = list(zip(
+                self.amounts, self.dates, self.descriptions, self.categories, self.category_versions
+            ))
+
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", newline="") as file:
+                csv.writer(file).writerows(columns)
+
+            with self._lock:
+                with open(temp_path, "a", newline="") as file:
+                    csv.writer(file).writerows(zip(
+                        self.amounts[rows:], self.dates[rows:], self.descriptions[rows:],
+                        self.categories[rows:], self.category_versions[rows:]
+                    ))
+                self._swap_compacted(temp_path, journal_size)
+        except OSError as e:
+            logger.error("Ledger compaction failed: %s", e)
+
+    def _compact_chunks(self):
+        """compact() without loading the ledger.
+
+        The ledger and journal as they were when compaction started (their
+        sizes) are streamed into the new file outside the lock; the lock is
+        only taken again to copy over the bytes appended to either since,
+        and to rename.
+        """
+        with self._lock:
+            if self.loaded:
+                self.compact()
+                return
+            if not os.path.exists(self.path) or not os.path.exists(self.journal_path):
+                return
+            size, journal_size = os.path.getsize(self.path), os.path.getsize(self.journal_path)
+
+        updates, _records = read_journal(self.journal_path, journal_size)
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", newline="") as file:
+                writer = csv.writer(file)
+                index = 0
+                for row in csv.reader(read_lines(self.path, size)):
+                    row = parse_row(row)
+                    if row is None:
+                        continue
+                    update = updates.get(index)
+                    if update is not None:
+                        row[3], row[4] = update
+                    index += 1
+                    writer.writerow(row)
+
+            with self._lock:
+                with open(self.path, "rb") as ledger, open(temp_path, "ab") as file:
+                    ledger.seek(size)
+                    shutil.copyfileobj(ledger, file)  # Rows appended while we streamed
+                self._swap_compacted(temp_path, journal_size)
+                self.save_rollups()  # Same totals; keeps the saved copy newer than the ledger
+        except OSError as e:
+            logger.error("Ledger compaction failed: %s", e)
+
+    def _swap_compacted(self, temp_path, journal_size):
+        """Renames the compacted ledger into place, keeping the journal past its first journal_size bytes.
+
+        Those are the records written since the compaction's snapshot.
+        """
+        with open(self.journal_path, "rb") as file:
+            file.seek(journal_size)
+            tail = file.read()
+        if tail:
+            journal_temp = self.journal_path + ".tmp"
+            with open(journal_temp, "wb") as file:
+                file.write(tail)
+            os.replace(temp_path, self.path)
+            os.replace(journal_temp, self.journal_path)
+        else:
+            os.replace(temp_path, self.path)
+            os.remove(self.journal_path)
+        self.journal_records = read_journal(self.journal_path)[1] if tail else 0
+
+    def flush(self):
+        """Waits for a pending compaction and saves the rollups (call before exit)."""
+        if self._pending_compaction is not None:
+            self._pending_compaction.result()
+            self._pending_compaction = None
+        self.save_rollups()
+
+    def _ledger_files(self):
+        """Files whose modification means saved rollups may be out of date."""
+        if os.path.isdir(self.path):
+            return [os.path.join(self.path, name) for name in os.listdir(self.path)]
+        return [self.path, self.journal_path, self.path + "-wal"]
+
+    def ensure_rollups(self):
+        """The rollups, loaded from disk if saved after the last ledger write, otherwise rebuilt."""
+        with self._lock:
+            if self.rollups is not None:
+                return self.rollups
+            try:
+                rollups = Rollups.load(self.rollups_path)
+                saved_at = os.path.getmtime(self.rollups_path)
+                rows = self.row_count()
+                fresh = (rows is None or rollups.rows == rows) and all(
+                    os.path.getmtime(path) <= saved_at for path in self._ledger_files() if os.path.exists(path)
+                )
+            except (OSError, ValueError, KeyError):
+                fresh = False
+            if not fresh:
+                with span("rollups.rebuild"):
+                    rollups = self._build_rollups()
+            self.rollups = rollups
+            return rollups
+
+    def _build_rollups(self):
+        """Rollups recomputed from every row, chunk by chunk."""
+        rollups = Rollups()
+        for chunk in self.iter_chunks():
+            for amount, date_text, _description, category, _version in chunk:
+                rollups.add(amount, date_text, category)
+        return rollups
+
+    def save_rollups(self):
+        with self._lock:
+            if self.rollups is None:
+                return
+            try:
+                self.rollups.save(self.rollups_path)
+            except OSError as e:
+                logger.warning("Saving rollups failed: %s", e)
+
+    def summary(self):
+        """(income, expense, absolute total per category, row count per category) from the rollups."""
+        self.backfill()
+        with self._lock:
+            return self.ensure_rollups().summary()
+
+    def expenses(self, granularity=None, by_category=False):
+        """Expense totals per category, or per "day"/"week"/"month" period (see Rollups.expenses)."""
+        self.backfill()
+        with self._lock:
+            return self.ensure_rollups().expenses(granularity, by_category)
+
+    def iter_chunks(self, chunk_rows=None):
+        """Yields [amount, date, description, category, version] rows in bounded lists (see core.streaming).
+
+        Read from the file while the ledger is not loaded, sliced from memory once it is.
+        """
+        chunk_rows = chunk_rows or DEFAULT_CHUNK_ROWS
+        if not self.loaded:
+            from core.streaming import read_chunks
+
+            if os.path.exists(self.path):
+                yield from read_chunks(self.path, chunk_rows)
+            return
+        start = 0
+        while True:
+            with self._lock:
+                stop = min(start + chunk_rows, len(self.amounts))
+                chunk = [list(row) for row in zip(
+                    self.amounts[start:stop], self.dates[start:stop], self.descriptions[start:stop],
+                    self.categories[start:stop], self.category_versions[start:stop]
+                )]
+            if not chunk:
+                return
+            yield chunk  # Outside the lock: the consumer may take its time
+            start = stop
+
+    def rows(self):
+        """Returns a snapshot of (amount, date, description) tuples."""
+        self.ensure_loaded()
+        with self._lock:
+            return list(zip(self.amounts, self.dates, self.descriptions))
+
+    def categorized_rows(self):
+        """Returns (amount, date, description, category) tuples, backfilling stale rows first."""
+        self.ensure_loaded()
+        self.backfill()
+        with self._lock:
+            return list(zip(self.amounts, self.dates, self.descriptions, self.categories))
+
+    def snapshot(self):
+        """Column copies (amounts, dates, descriptions, categories), backfilling stale rows first."""
+        self.ensure_loaded()
+        self.backfill()
+        with self._lock:
+            return list(self.amounts), list(self.dates), list(self.descriptions), list(self.categories)
+
+    def totals(self, start=None, end=None):
+        """(income, expense) over rows dated within [start, end]; ISO date strings, inclusive, None is open."""
+        income = expense = 0.0
+        if not self.loaded:
+            for row in self._range_rows(start, end):
+                if row[0] > 0:
+                    income += row[0]
+                else:
+                    expense -= row[0]
+            return income, expense
+        with self._lock:
+            for amount, date in zip(self.amounts, self.dates):
+                if (start is None or date >= start) and (end is None or date <= end):
+                    if amount > 0:
+                        income += amount
+                    else:
+                        expense -= amount
+        return income, expense
+
+    def category_totals(self, start=None, end=None):
+        """Net amount per category over rows dated within [start, end], backfilling stale rows first."""
+        self.backfill()
+        totals = {}
+        if not self.loaded:
+            for row in self._range_rows(start, end):
+                totals[row[3]] = totals.get(row[3], 0.0) + row[0]
+            return totals
+        with self._lock:
+            for amount, date, category in zip(self.amounts, self.dates, self.categories):
+                if (start is None or date >= start) and (end is None or date <= end):
+                    totals[category] = totals.get(category, 0.0) + amount
+        return totals
+
+    def _range_rows(self, start, end):
+        """Rows dated within [start, end], streamed chunk by chunk (the ledger is not loaded)."""
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                if (start is None or row[1] >= start) and (end is None or row[1] <= end):
+                    yield row
+
+    def to_dataframe(self, names=("amount", "date", "description", "category")):
+        """Builds a pandas DataFrame from memory, using the given column names."""
+        import pandas as pd
+
+        self.ensure_loaded()
+        self.backfill()
+        with self._lock:
+            columns = (list(self.amounts), list(self.dates), list(self.descriptions), list(self.categories))
+        return pd.DataFrame(dict(zip(names, columns)))
+
+    def subscribe(self, callback):
+        """Registers callback(store) to run after every write."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception as e:
+                logger.exception("Store listener failed: %s", e)
+
+
+def create_store(backend="csv", settings=None):
+    """Builds an unloaded store for a storage backend name ("csv", "sqlite", "columnar" or "partitioned")."""
+    settings = settings or {}
+    if backend == "sqlite":
+        from core.sqlite_store import SQLiteTransactionStore
+        return SQLiteTransactionStore()
+    if backend == "columnar":
+        from core.columnar_store import ColumnarTransactionStore
+        return ColumnarTransactionStore()
+    if backend == "partitioned":
+        from core.partitioned_store import PartitionedTransactionStore
+        return PartitionedTransactionStore(compression=settings.get("partition_compression"))
+    return TransactionStore()
+
+
+_store = None
+
+
+def get_store():
+    """Returns the shared store for the configured backend, opened on first use."""
+    global _store
+    if _store is None:
+        settings = load_settings()
+        _store = create_store(settings.get("storage_backend", "csv"), settings)
+        _store.open()
+    return _store
@@ -0,0 +1,71 @@
+import csv
+
+from core.instrumentation import count
+from core.rollups import Rollups
+from core.store import (
+    DEFAULT_CHUNK_ROWS, JOURNAL_SUFFIX, MANUAL_VERSION, TRANSACTIONS_FILE, parse_row, read_journal
+)
+
+
+def read_chunks(path=TRANSACTIONS_FILE, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yields the CSV ledger as lists of at most chunk_rows [amount, date, description, category, version] rows.
+
+    Journalled category updates are applied on the fly, so chunks match
+    what TransactionStore.load() would hold in memory. Only one chunk
+    (plus the journal, which compaction keeps small) is alive at a time.
+    """
+    updates, _records = read_journal(path + JOURNAL_SUFFIX)
+    chunk, index = [], 0
+    with open(path, "r", newline="") as file:
+        for row in csv.reader(file):
+            row = parse_row(row)
+            if row is None:
+                continue
+            update = updates.get(index)
+            if update is not None:
+                row[3], row[4] = update
+            index += 1
+            chunk.append(row)
+            if len(chunk) >= chunk_rows:
+                count("rows parsed", len(chunk))
+                yield chunk
+                chunk = []
+    if chunk:
+        count("rows parsed", len(chunk))
+        yield chunk
+
+
+def categorize_chunks(chunks, categorize, categorizer_version):
+    """Yields the chunks with rows the categorizer did not produce recategorized.
+
+    Recategorized rows are new lists in a copy of the chunk: neither the
+    ledger nor rows a store may be caching are modified.
+    """
+    for chunk in chunks:
+        stale = [i for i, row in enumerate(chunk) if row[4] != categorizer_version and row[4] != MANUAL_VERSION]
+        if stale:
+            chunk = list(chunk)
+            for i, category in zip(stale, categorize([chunk[i][2] for i in stale])):
+                chunk[i] = [*chunk[i][:3], category, categorizer_version]
+        yield chunk
+
+
+def fold_rollups(chunks, categorize=None, categorizer_version=None):
+    """Folds row chunks into Rollups; memory stays at one chunk plus the (period, category) buckets.
+
+    With a categorizer, stale rows are recategorized one chunk at a time
+    (see categorize_chunks), the same answer a backfill followed by the
+    in-memory rollups gives.
+    """
+    rollups = Rollups()
+    if categorize is not None:
+        chunks = categorize_chunks(chunks, categorize, categorizer_version)
+    for chunk in chunks:
+        for amount, date_text, _description, category, _version in chunk:
+            rollups.add(amount, date_text, category)
+    return rollups
+
+
+def stream_summary(path=TRANSACTIONS_FILE, chunk_rows=DEFAULT_CHUNK_ROWS, categorize=None, categorizer_version=None):
+    """(income, expense, per-category totals, per-category counts) of a CSV ledger, read in chunks."""
+    return fold_rollups(read_chunks(path, chunk_rows), categorize, categorizer_version).summary()
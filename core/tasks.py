@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, Signal
+
+logger = logging.getLogger(__name__)
+
+
+class TaskScheduler(QObject):
+    """Runs heavy work on a thread pool and hands results back on the GUI thread.
+
+    Work is submitted on a named channel ("summary", "table", "chart").
+    A newer submit on the same channel supersedes the older one: if it
+    has not started it is cancelled, and if it is already running its
+    result is dropped when it arrives. Results travel back through a Qt
+    signal, so callbacks always run on the thread that owns the
+    scheduler.
+    """
+
+    finished = Signal(str, int, object)  # channel, generation, result
+    failed = Signal(str, int, str)  # channel, generation, error message
+
+    def __init__(self, max_workers=None):
+        super().__init__()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1), thread_name_prefix="finance-worker"
+        )
+        self._lock = threading.Lock()
+        self._generations = {}
+        self._futures = {}
+        self._callbacks = {}
+        self.finished.connect(self._deliver)
+        self.failed.connect(self._deliver_error)
+
+    def submit(self, channel, fn, *args, on_done=None, on_error=None):
+        """Runs fn(*args) off-thread; on_done(result) runs on the GUI thread unless superseded."""
+        with self._lock:
+            generation = self._generations.get(channel, 0) + 1
+            self._generations[channel] = generation
+            previous = self._futures.get(channel)
+            if previous is not None:
+                previous.cancel()
+            self._callbacks[channel] = (generation, on_done, on_error)
+            self._futures[channel] = self._executor.submit(self._run, channel, generation, fn, args)
+        return generation
+
+    def cancel(self, *channels):
+        """Drops pending and in-flight work on the given channels."""
+        with self._lock:
+            for channel in channels:
+                self._generations[channel] = self._generations.get(channel, 0) + 1
+                future = self._futures.pop(channel, None)
+                if future is not None:
+                    future.cancel()
+                self._callbacks.pop(channel, None)
+
+    def is_current(self, channel, generation):
+        """Lets long-running work bail out early once it has been superseded."""
+        return self._generations.get(channel) == generation
+
+    def shutdown(self):
+        self.cancel(*list(self._generations))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, channel, generation, fn, args):
+        if not self.is_current(channel, generation):
+            return
+        try:
+            result = fn(*args)
+        except Exception as e:
+            self.failed.emit(channel, generation, f"{type(e).__name__}: {e}")
+            return
+        self.finished.emit(channel, generation, result)
+
+    def _take_callbacks(self, channel, generation):
+        with self._lock:
+            entry = self._callbacks.get(channel)
+            if entry is None or entry[0] != generation or not self.is_current(channel, generation):
+                return None  # Superseded by a newer request
+            del self._callbacks[channel]
+            self._futures.pop(channel, None)
+            return entry
+
+    def _deliver(self, channel, generation, result):
+        entry = self._take_callbacks(channel, generation)
+        if entry and entry[1]:
+            entry[1](result)
+
+    def _deliver_error(self, channel, generation, message):
+        entry = self._take_callbacks(channel, generation)
+        if entry is None:
+            return
+        if entry[2]:
+            entry[2](message)
+        else:
+            logger.error("Background %s task failed: %s", channel, message)
+
+
+_scheduler = None
+
+
+def get_scheduler():
+    """Returns the shared scheduler; create it from the GUI thread."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = TaskScheduler()
+    return _scheduler
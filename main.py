@@ -1,114 +1,28 @@
 
-import os
-import json
+import time
+STARTUP_STARTED = time.perf_counter()  # Origin of the startup-timing breakdown
 
-# Set path to save budgets.json in the same folder as main.py
-BUDGET_FILE = os.path.join(os.path.dirname(__file__), "budgets.json")
-
-def load_budgets():
-    if os.path.exists(BUDGET_FILE):
-        with open(BUDGET_FILE, "r") as file:
-            return json.load(file)
-    return {}
-
-def save_budgets(budgets):
-    with open(BUDGET_FILE, "w") as file:
-        json.dump(budgets, file)
-        
 import sys
-import csv
-import json
-import os
-from datetime import datetime
-
-# Data Processing
-import pandas as pd
-from joblib import dump, load
-
-# Machine Learning
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import make_pipeline
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+import logging
 
 # Qt Framework
-from PySide6.QtWidgets import (QApplication, QMainWindow, QStackedWidget, 
-                              QMessageBox, QGraphicsOpacityEffect, QLabel)
-from PySide6.QtCore import QPropertyAnimation, Qt
-from PySide6.QtGui import QColor
-
-# Application Pages
-from pages.dashboard import Dashboard
-from pages.add_income import AddIncomePage
-from pages.add_expense import AddExpensePage
-from pages.transactions import TransactionsPage
-from pages.reports import ReportsPage
-from pages.settings import SettingsPage
-
-
-
-class AICategorizer:
-    def __init__(self, model_path=None):
-        # Default model path: ~/ai_models/expense_model.joblib
-        if not model_path:
-            home_dir = os.path.expanduser("~")
-            model_path = os.path.join(home_dir, 'ai_models', 'expense_model.joblib')
-
-        # Ensure the folder exists
-        os.makedirs(os.path.dirname(model_path), exist_ok=True)
-
-        self.model_path = model_path
-        self.model = make_pipeline(
-            CountVectorizer(ngram_range=(1, 2), stop_words='english', min_df=2),
-            MultinomialNB()
-        )
-
-        # Load saved model if it exists
-        self.trained = False
-
-        if os.path.exists(self.model_path):
-            self.model = load(self.model_path)
-            self.trained = True
-    
-    def train(self, descriptions, categories):
-        self.trained = True
-        """Train model with evaluation"""
-        if len(set(categories)) < 2:
-            return 0  # Need at least 2 categories to train
-            
-        X_train, X_test, y_train, y_test = train_test_split(
-            pd.Series(descriptions), 
-            categories,
-            test_size=0.2,
-            random_state=42
-        )
-        
-        self.model.fit(X_train, y_train)
-        dump(self.model, self.model_path)
-        
-        # Evaluate accuracy
-        y_pred = self.model.predict(X_test)
-        acc = accuracy_score(y_test, y_pred)
-        print(f"Model trained. Accuracy: {acc:.2f}")
-        return acc
-    
-    def predict(self, description, confidence_threshold=0.7):
-        """Predict with confidence checking"""
-        if not self.trained:
-            print("Prediction skipped: model not trained.")
-            return None
-        try:
-            proba = self.model.predict_proba([description])[0]
-            max_prob = max(proba)
-            if max_prob >= confidence_threshold:
-                return self.model.classes_[proba.argmax()]
-        except Exception as e:
-            print(f"Prediction error: {str(e)}")
-        return None
+from PySide6.QtWidgets import QApplication, QMainWindow, QStackedWidget, QGraphicsOpacityEffect
+from PySide6.QtCore import QPropertyAnimation, QTimer
 
+# Application Pages are imported when first shown (see MainWindow.create_page);
+# pandas, matplotlib and sklearn stay out of startup unless a feature needs them.
+from core.startup import StartupTimer
+from core.log import configure_logging
+from core.instrumentation import get_instrumentation, span
+from core.settings import load_settings, update_settings
+from core.budgets import get_budget_engine, save_budgets
+from core.store import get_store
+from core.tasks import get_scheduler
+from core.categorizer import TransactionCategorizer
 
-#
+logger = logging.getLogger(__name__)
+startup_timer = StartupTimer(STARTUP_STARTED)
+startup_timer.mark("imports")
 
 
 class MainWindow(QMainWindow):
@@ -119,197 +33,177 @@ class MainWindow(QMainWindow):
         
         # Initialize systems
         self.theme = self.load_theme()
-        self.ai_categorizer = AICategorizer()
+        # Known names, model and keyword rules; shared with the headless CLI (core.cli)
+        self.categorizer = TransactionCategorizer(incremental=self.load_settings().get("incremental_learning", False))
+        self.ai_categorizer = self.categorizer.ai_categorizer
+        self.rule_engine = self.categorizer.rule_engine
+        self.register_categorizer()
+        self.scheduler = get_scheduler()
+        self.summary_key = None  # Store data_key() the Dashboard figures were computed from
+        self.current_page = "Dashboard"
+        self.switch_started = None  # perf_counter() of the last navigation, for the switch latency
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_current_page)
+        startup_timer.mark("categorizer")
         self.init_ui()
+        startup_timer.mark("ui")
         
 
         self.load_initial_data()
+        startup_timer.mark("initial data")
     
     def init_ui(self):
         """Initialize user interface"""
         self.stack = QStackedWidget()
         self.setCentralWidget(self.stack)
         
-        self.pages = {
-            "Dashboard": Dashboard(self.switch_page),
-            "Add Income": AddIncomePage(self.switch_page),
-            "Add Expense": AddExpensePage(self.switch_page),
-            "Transactions": TransactionsPage(self.switch_page),
-            "Reports": ReportsPage(self.switch_page),
-            "Settings": SettingsPage(self.switch_page, self.apply_theme)
-        }
-        
-        for page in self.pages.values():
-            self.stack.addWidget(page)
+        # Pages are built on first navigation; only the Dashboard is needed up front
+        self.pages = {}
         
         self.apply_theme(self.theme)
-        self.stack.setCurrentWidget(self.pages["Dashboard"])
+        self.stack.setCurrentWidget(self.get_page("Dashboard"))
+
+    def get_page(self, page_name):
+        """Returns a page, building it the first time it is needed."""
+        page = self.pages.get(page_name)
+        if page is None:
+            page = self.create_page(page_name)
+            self.pages[page_name] = page
+            self.stack.addWidget(page)
+        return page
+
+    def create_page(self, page_name):
+        """Imports and constructs one page; heavy modules load with the page that uses them."""
+        if page_name == "Dashboard":
+            from pages.dashboard import Dashboard
+            return Dashboard(self.switch_page)
+        if page_name == "Add Income":
+            from pages.add_income import AddIncomePage
+            return AddIncomePage(self.switch_page)
+        if page_name == "Add Expense":
+            from pages.add_expense import AddExpensePage
+            return AddExpensePage(self.switch_page, self.learn_from_expense)
+        if page_name == "Transactions":
+            from pages.transactions import TransactionsPage
+            return TransactionsPage(self.switch_page)
+        if page_name == "Reports":
+            from pages.reports import ReportsPage
+            return ReportsPage(self.switch_page)
+        if page_name == "Settings":
+            from pages.settings import SettingsPage
+            return SettingsPage(self.switch_page, self.apply_theme, get_budget_engine().budgets, save_budgets)
+        raise KeyError(page_name)
     
     def load_initial_data(self):
         """Load data and train AI model"""
         try:
-            # Read transactions with proper headers
-            """Train model with predefined sample data only"""
-            # Sample training data
-            training_data = [
-                ("pizza", "Food"),
-                ("flipkart headphones", "Shopping"),
-                ("ola ride", "Transport"),
-                ("uber ride", "Transport"),
-                ("salary", "Income"),
-                ("pen", "Stationery"),
-                ("checking out", "Other"),
-                ("trip", "Travel"),
-                ("notebooks", "Stationery"),
-                ("coffee", "Food"),
-                ("movie ticket", "Entertainment"),
-                ("restaurant food", "Food"),
-                ("laundry", "Utilities"),
-                ("groceries", "Food"),
-                ("internet subscription", "Utilities"),
-                ("flipkart order", "Shopping"),
-                ("burger", "Food"),
-                ("icecream", "Food"),
-                ("haircut", "Personal Care"),
-                ("printer paper", "Stationery"),
-                ("snacks", "Food"),
-            ]
-
-            descriptions = [item[0] for item in training_data]
-            categories = [item[1] for item in training_data]
-
-            
-            self.ai_categorizer.train(descriptions, categories)
+            # Train model with predefined sample data only
+            self.categorizer.train_defaults()
                 
-        except (FileNotFoundError, pd.errors.EmptyDataError) as e:
-            print(f"Initial data loading: {str(e)}")
-            
-        try:
-            df = pd.read_csv('transactions.csv', 
-                            header=None,
-                            names=['amount', 'date', 'description'],
-                            dtype={'amount': float, 'description': str})
-            
-            if not df.empty:
-                # Drop rows with missing description
-                df = df.dropna(subset=['description'])
-
-                # Step 3: Predict categories using AI
-                df['predicted_category'] = df['description'].apply(self.ai_categorizer.predict)
+        except (OSError, ValueError) as e:
+            logger.warning("Initial data loading: %s", e)
 
+        # A retrained model changes the version tag; stale rows are recategorized by the
+        # summary's backfill on a worker thread, never before the first paint
+        self.register_categorizer()
+        self.update_summary()
 
-                # Store for chart/reporting
-                self.predicted_df = df
+    def register_categorizer(self):
+        """Lets the store persist categories tagged with the current model/rule-set version"""
+        self.categorizer.register(get_store())
 
-                # Optional: Print predictions
-                print("\nPredicted categories for transactions:")
-                print(df[['description', 'predicted_category']].to_string(index=False))
-        
-        except Exception as e:
-            print(f"Error loading transaction data: {e}")
-            self.predicted_df = pd.DataFrame(columns=['amount', 'date', 'description', 'predicted_category'])
-    
     def categorize_expense(self, description):
-        
-        if pd.notna(description) and str(description).strip():
-            ai_category = self.ai_categorizer.predict(description, confidence_threshold=0.75)
-            if ai_category:
-                return ai_category
-        return self.rule_based_categorize(description)
-        
-    def rule_based_categorize(self, description):
-        """Original rule-based system"""
-        rules = {
-            "Food": ["pizza", "burger", "restaurant", "cafe", "restaurant food","groceries","snacks","icecream","coffee"],
-            "Transport": ["uber ride", "bus", "train", "taxi", "fuel","ola ride","uber"],
-            "Entertainment": ["netflix", "cinema", "movie", "concert", "game","checking out","trip"],
-            "Shopping": ["amazon", "mall", "clothing", "electronics","flipkart headphones","groceries","flipkart order"],
-            "Utilities": ["electricity", "water", "internet", "gas", "rent","laundry"],
-            "Stationary":["pen","notebooks","printer paper","internet subscription"]
-        }
-        
-        if pd.isna(description):
-            return "Other"
-            
-        description = str(description).lower()
-        for category, keywords in rules.items():
-            if any(keyword in description for keyword in keywords):
-                return category
-        return "Other"
-    
-    def update_summary(self):
-        """Updates financial metrics with AI-enhanced categories and prints predicted categories"""
-        total_income = 0
-        total_expense = 0
-        categorized_totals = {}
-        category_counts = {}
-
-        print("\nPredicted categories for transactions:")
-
-        try:
-            with open("transactions.csv", "r") as file:
-                reader = csv.reader(file)
-                for row in reader:
-                    if len(row) < 3:  # Skip malformed rows (expecting amount, date, description)
-                        continue
-
-                    try:
-                        amount = float(row[0])
-                        description = row[2]  # 3rd column is description
-                        category = self.categorize_expense(description)  # AI-based categorization
-
-                        # Print each predicted category
-                        print(f"'{description}' => {category}")
-
-                        if amount > 0:
-                            total_income += amount
-                        else:
-                            total_expense += abs(amount)
-
-                        if category not in categorized_totals:
-                            categorized_totals[category] = 0
-                            category_counts[category] = 0
+        return self.categorizer.categorize_expense(description)
 
-                        categorized_totals[category] += abs(amount)
-                        category_counts[category] += 1
+    def categorize_expenses(self, descriptions):
+        """Batched categorize_expense: one model call for the whole column"""
+        return self.categorizer.categorize_expenses(descriptions)
 
-                    except (ValueError, IndexError):
-                        continue
-
-        except FileNotFoundError:
-            print("transactions.csv not found. Defaulting totals to 0.")
+    def update_summary(self):
+        """Recomputes the summary on a worker thread unless the data is unchanged since the last one"""
+        if self.summary_key == get_store().data_key():
+            return
+        self.scheduler.submit("summary", self.compute_summary, on_done=self.apply_summary)
+
+    def compute_summary(self):
+        """(data key, metrics) with AI-enhanced categories, read from the store's rollups"""
+        # Categories are persisted in the store; only stale rows get recategorized
+        with span("summary.compute"):
+            store = get_store()
+            store.backfill()
+            key = store.data_key()
+            return key, store.summary()
+
+    def apply_summary(self, result):
+        self.summary_key, (total_income, total_expense, _category_totals, _category_counts) = result
 
         # Update Dashboard UI
-        dashboard = self.pages["Dashboard"]
+        dashboard = self.get_page("Dashboard")
         dashboard.total_income_label.setText(f"Total Income: ₹{total_income:.2f}")
         dashboard.total_expense_label.setText(f"Total Expense: ₹{total_expense:.2f}")
         dashboard.remaining_balance_label.setText(f"Remaining Balance: ₹{total_income - total_expense:.2f}")
 
-        # Update Reports chart with categorized data
-        self.pages["Reports"].update_charts(categorized_totals, category_counts)
+    def learn_from_expense(self, description, category):
+        """A user-labelled expense; folded into the model when learning incrementally."""
+        self.ai_categorizer.learn([description], [category])
+
+    def paintEvent(self, event):
+        """The first paint closes the startup-timing breakdown."""
+        super().paintEvent(event)
+        if not startup_timer.finished:
+            startup_timer.finish()
+
+    def closeEvent(self, event):
+        """Make sure incremental model updates and ledger compaction reach the disk before exit."""
+        self.scheduler.shutdown()
+        self.ai_categorizer.flush()
+        get_store().flush()
+        get_instrumentation().dump()
+        super().closeEvent(event)
+
+    # Background channels each page consumes; work for other channels is stale once we navigate
+    PAGE_CHANNELS = {
+        "Dashboard": {"summary"},
+        "Transactions": {"table"},
+        "Reports": {"chart"},
+    }
+
+    # Navigation bursts within this window collapse into one refresh of the page left showing
+    REFRESH_DELAY_MS = 30
 
-        self.budgets = load_budgets()
-        
-    #
-    
-    
     def switch_page(self, page_name):
-        """Handles navigation with smooth transitions."""
-        self.animate_page_switch(self.pages[page_name])
-
+        """Handles navigation with smooth transitions; refreshes run in the background."""
+        self.switch_started = time.perf_counter()
+        with span("page.switch"):
+            self.animate_page_switch(self.get_page(page_name))
+        self.current_page = page_name
+
+        needed = self.PAGE_CHANNELS.get(page_name, set())
+        self.scheduler.cancel(*({"summary", "table", "chart"} - needed))
+        self.refresh_timer.start(self.REFRESH_DELAY_MS)
+
+    def refresh_current_page(self):
+        """Refreshes the visible page; each view skips the work if its data has not changed."""
+        page_name = self.current_page
+        if self.switch_started is not None:
+            # Navigation to refresh, including the coalescing delay and event-loop wait
+            get_instrumentation().record("page.switch_latency", time.perf_counter() - self.switch_started)
+            self.switch_started = None
         if page_name == "Dashboard":
             self.update_summary()
         elif page_name == "Transactions":
             self.pages["Transactions"].update_table()
         elif page_name == "Reports":
-            self.update_summary()
+            self.pages["Reports"].update_chart()
 
     def animate_page_switch(self, new_page):
         """Creates a fade transition effect when switching pages."""
         opacity_effect = QGraphicsOpacityEffect()
         self.stack.setGraphicsEffect(opacity_effect)
 
-        animation = QPropertyAnimation(opacity_effect, b"opacity")
+        # Keep a reference, otherwise the animation can be collected before it finishes
+        self.page_animation = animation = QPropertyAnimation(opacity_effect, b"opacity")
         animation.setDuration(300)
         animation.setStartValue(0.1)
         animation.setEndValue(1.0)
@@ -317,19 +211,17 @@ class MainWindow(QMainWindow):
 
         self.stack.setCurrentWidget(new_page)
     
+    def load_settings(self):
+        """Reads settings.json, or an empty dict if it does not exist yet."""
+        return load_settings()
+
     def load_theme(self):
         """Loads the saved background color."""
-        try:
-            with open("settings.json", "r") as file:
-                data = json.load(file)
-                return data.get("background_color", "#FFFFFF")
-        except FileNotFoundError:
-            return "#FFFFFF"
+        return self.load_settings().get("background_color", "#FFFFFF")
 
     def save_theme(self, color_hex):
-        """Saves the selected background color."""
-        with open("settings.json", "w") as file:
-            json.dump({"background_color": color_hex}, file)
+        """Saves the selected background color, keeping the other settings."""
+        update_settings(background_color=color_hex)
 
     def apply_theme(self, color_hex):
         """Applies the user-selected background color."""
@@ -347,7 +239,9 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
+    configure_logging()
     app = QApplication(sys.argv)
+    startup_timer.mark("qt app")
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
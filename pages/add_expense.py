@@ -1,14 +1,18 @@
-import csv
-import json
-import pandas as pd
-from datetime import datetime
+import logging
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QDateEdit, QPushButton, QMessageBox
 from PySide6.QtCore import Qt, QDate
+from core.budgets import get_budget_engine
+from core.rules import canonical_category
+from core.store import get_store
+
+logger = logging.getLogger(__name__)
 
 class AddExpensePage(QWidget):
-    def __init__(self, switch_callback):
+    def __init__(self, switch_callback, learn_callback=None):
         super().__init__()
 
+        self.learn_callback = learn_callback  # Called with (description, category) for user-labelled expenses
+
         # Page Layout
         layout = QVBoxLayout()
         layout.setContentsMargins(20, 20, 20, 20)
@@ -69,6 +73,20 @@ class AddExpensePage(QWidget):
         layout.addWidget(QLabel("Expense Category:", styleSheet="font-size: 16px; font-weight: bold; color: #FFFFFF;"))
         layout.addWidget(self.category_input)
 
+        # Optional Description Field
+        self.description_input = QLineEdit()
+        self.description_input.setPlaceholderText("Optional, e.g., uber ride to college")
+        self.description_input.setStyleSheet("""
+            font-size: 14px;
+            padding: 5px;
+            border: 1px solid #666666;
+            border-radius: 5px;
+            color: #FFFFFF;
+            background-color: #222222;
+        """)
+        layout.addWidget(QLabel("Description:", styleSheet="font-size: 16px; font-weight: bold; color: #FFFFFF;"))
+        layout.addWidget(self.description_input)
+
         # Add Button
         add_button = QPushButton("Add Expense")
         add_button.setStyleSheet("""
@@ -103,21 +121,32 @@ class AddExpensePage(QWidget):
         amount = self.amount_input.text()
         date = self.date_input.date()
         category = self.category_input.text()
+        description = self.description_input.text().strip()
 
         if amount and category:
-            transaction = [-float(amount), date.toString("yyyy-MM-dd"), category]
-            self.save_to_csv(transaction)
+            if description:
+                # A described expense is a labelled example: keep the user's category and learn from it
+                # Same spelling as the budgets and categorizer use, so "food" counts towards "Food"
+                category = canonical_category(category, get_budget_engine().budgets)
+                transaction = [-float(amount), date.toString("yyyy-MM-dd"), description]
+                stored_category = self.save_to_csv(transaction, category)
+                if self.learn_callback:
+                    self.learn_callback(description, category)
+            else:
+                transaction = [-float(amount), date.toString("yyyy-MM-dd"), category]
+                stored_category = self.save_to_csv(transaction)
             self.show_success_popup()
-            print(f"Added Expense: {transaction}")
-            self.check_budget_and_notify()
+            logger.info("Added expense: %s", transaction)
+            if stored_category is not None:
+                self.check_budget_and_notify(stored_category)
 
-    def save_to_csv(self, transaction):
+    def save_to_csv(self, transaction, category=None):
+        """Appends the transaction; returns the category it was stored under, or None on failure."""
         try:
-            with open("transactions.csv", "a", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow(transaction)
+            return get_store().append(transaction, category)
         except Exception as e:
-            print(f"Error saving to CSV: {e}")
+            logger.error("Error saving to CSV: %s", e)
+            return None
 
     def show_success_popup(self):
         msg_box = QMessageBox()
@@ -131,33 +160,19 @@ class AddExpensePage(QWidget):
         """)
         msg_box.exec()
 
-    def check_budget_and_notify(self):
+    def check_budget_and_notify(self, category):
+        """Warns when this expense takes its category's month-to-date spend past 80% or 100% of budget."""
         try:
-            with open("settings.json", "r") as f:
-                settings = json.load(f)
-
-            budgets = settings.get("budgets", {})
-            if not budgets:
-                return
-
-            df = pd.read_csv("transactions.csv")
-            df["Date"] = pd.to_datetime(df["Date"])
-
-            now = datetime.now()
-            df = df[(df["Date"].dt.month == now.month) & (df["Date"].dt.year == now.year)]
-
             messages = []
 
-            for category, budget in budgets.items():
-                spent = df[df["Category"] == category]["Amount"].sum()
-
-                if spent >= budget:
-                    messages.append(f"⚠️ You have **exceeded** your budget for '{category}'!\nSpent: ₹{abs(spent)}, Limit: ₹{budget}")
-                elif spent >= 0.8 * budget:
-                    messages.append(f"🔔 You've spent **over 80%** of your budget for '{category}'.\nSpent: ₹{abs(spent)}, Limit: ₹{budget}")
+            for category, spent, budget, threshold in get_budget_engine().alerts([category]):
+                if threshold >= 1.0:
+                    messages.append(f"⚠️ You have **exceeded** your budget for '{category}'!\nSpent: ₹{spent}, Limit: ₹{budget}")
+                else:
+                    messages.append(f"🔔 You've spent **over 80%** of your budget for '{category}'.\nSpent: ₹{spent}, Limit: ₹{budget}")
 
             if messages:
                 QMessageBox.warning(self, "Budget Warning", "\n\n".join(messages))
 
         except Exception as e:
-            print(f"[Budget Check Error] {e}")
+            logger.exception("Budget check failed: %s", e)
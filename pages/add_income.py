@@ -1,6 +1,9 @@
-import csv
+import logging
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QDateEdit, QPushButton, QMessageBox
 from PySide6.QtCore import Qt, QDate
+from core.store import get_store
+
+logger = logging.getLogger(__name__)
 
 class AddIncomePage(QWidget):
     def __init__(self, switch_callback):
@@ -109,15 +112,13 @@ class AddIncomePage(QWidget):
             transaction = [amount, date.toString("yyyy-MM-dd"), category]
             self.save_to_csv(transaction)
             self.show_success_popup()  # Show confirmation pop-up
-            print(f"Added Income: {transaction}")
+            logger.info("Added income: %s", transaction)
 
     def save_to_csv(self, transaction):
         try:
-            with open("transactions.csv", "a", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerow(transaction)
+            get_store().append(transaction)
         except Exception as e:
-            print(f"Error saving to CSV: {e}")
+            logger.error("Error saving to CSV: %s", e)
 
     def show_success_popup(self):
         msg_box = QMessageBox()
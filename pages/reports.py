@@ -1,11 +1,184 @@
+import logging
 import sys
+import threading
+from collections import OrderedDict
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib import colormaps
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QComboBox
 from PySide6.QtCore import Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PySide6.QtGui import QImage, QPixmap
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.figure import Figure
+from core.instrumentation import count, span
+from core.rollups import week_label
+from core.store import get_store
+from core.tasks import get_scheduler
+
+logger = logging.getLogger(__name__)
+
+CHART_DPI = 100
+
+
+class ChartCache:
+    """Computed series per chart type and rasterized charts per (type, size), for one data version.
+
+    Flipping between chart types, or coming back to the page, reuses what
+    was already computed; only a change of the store's data_key() recomputes.
+    """
+
+    def __init__(self, max_images=16):
+        self.max_images = max_images
+        self._series = {}  # chart type -> (data key, series)
+        self._images = OrderedDict()  # (chart type, width, height) -> (data key, rendered)
+        self._lock = threading.Lock()
+
+    def series(self, selected_chart, key):
+        with self._lock:
+            cached = self._series.get(selected_chart)
+        return cached[1] if cached is not None and cached[0] == key else None
+
+    def put_series(self, selected_chart, key, series):
+        with self._lock:
+            self._series[selected_chart] = (key, series)
+
+    def image(self, selected_chart, width, height, key):
+        with self._lock:
+            cached = self._images.get((selected_chart, width, height))
+            if cached is None or cached[0] != key:
+                return None
+            self._images.move_to_end((selected_chart, width, height))
+            return cached[1]
+
+    def put_image(self, selected_chart, width, height, key, rendered):
+        with self._lock:
+            self._images[(selected_chart, width, height)] = (key, rendered)
+            self._images.move_to_end((selected_chart, width, height))
+            while len(self._images) > self.max_images:
+                self._images.popitem(last=False)
+
+
+def chart_series(selected_chart, store):
+    """The data behind a chart, read from the store's rollups."""
+    if selected_chart == "Pie Chart - Categories":
+        # Expenses by category
+        return pd.Series(store.expenses(), dtype=float)
+
+    if selected_chart == "Weekly Spending":
+        # Expenses per ISO week, labelled like pandas weekly periods
+        weekly_totals = pd.Series(
+            {week_label(week): total for week, total in store.expenses("week").items()}, dtype=float
+        )
+        weekly_totals.index.name = "Week"
+        return weekly_totals
+
+    if selected_chart == "Monthly Breakdown":
+        # Expenses per (month, category)
+        totals = store.expenses("month", by_category=True)
+        monthly_totals = pd.Series(
+            list(totals.values()), index=pd.MultiIndex.from_tuples(list(totals), names=["Month", "Category"]),
+            dtype=float
+        )
+        return monthly_totals.unstack()
+
+    if selected_chart == "Monthly Comparison":
+        # Total spending per month
+        return pd.Series(store.expenses("month"), dtype=float)
+
+    return None
+
+
+def draw_chart(selected_chart, series, width, height):
+    """Draws a chart's series into an RGBA buffer with Agg (thread-safe, no Qt)."""
+    figure = Figure(figsize=(width / CHART_DPI, height / CHART_DPI), dpi=CHART_DPI)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+
+    if series.empty:
+        # Nothing to plot yet: pandas would raise, leave a note instead
+        ax.text(0.5, 0.5, "No expenses to chart yet", ha="center", va="center", transform=ax.transAxes)
+        ax.set_axis_off()
+
+    elif selected_chart == "Pie Chart - Categories":
+        # Generate color map
+        unique_categories = series.index
+        colors = colormaps["tab10"].colors[:len(unique_categories)]  # Assign dynamic colors
+
+        # Create pie chart with enhanced labels
+        series.plot(kind="pie", autopct="%1.1f%%", startangle=90, ax=ax, colors=colors)
+        ax.set_title("Spending by Category")
+        ax.set_ylabel("")  # Hide y-label
+
+    elif selected_chart == "Weekly Spending":
+        # Improved bar chart with labels
+        series.plot(kind="bar", color="blue", ax=ax)
+        ax.set_title("Weekly Spending Trend")
+        ax.set_xlabel("Week")
+        ax.set_ylabel("Total Spent (₹)")
+        ax.grid(True, linestyle="--", alpha=0.6)
+
+        # Add data labels for better readability
+        for i, v in enumerate(series):
+            ax.text(i, v + 200, f"₹{int(v)}", ha="center", fontsize=10, fontweight="bold")
+
+    elif selected_chart == "Monthly Breakdown":
+        # Stacked bar chart with category-wise spending
+        series.plot(kind="bar", stacked=True, ax=ax, cmap="coolwarm")
+        ax.set_title("Monthly Spending Breakdown")
+        ax.set_xlabel("Month")
+        ax.set_ylabel("Total Spent (₹)")
+        ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc="upper left")
+
+    elif selected_chart == "Monthly Comparison":
+        # Compare total spending across months + add trend line
+        series.plot(kind="bar", color="red", ax=ax)
+        ax.set_title("Month-to-Month Spending Comparison")
+        ax.set_xlabel("Month")
+        ax.set_ylabel("Total Spent (₹)")
+
+        # Add trend line (Linear Fit), which needs at least two months
+        if len(series) >= 2:
+            x = np.arange(len(series))
+            y = series.values
+            m, b = np.polyfit(x, y, 1)  # Linear regression
+            ax.plot(x, m*x + b, color="blue", linestyle="dashed", linewidth=2)
+
+    # Rasterize
+    figure.tight_layout()
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    return bytes(canvas.buffer_rgba()), width, height
+
+
+def render_chart(selected_chart, width, height, cache=None):
+    """Computes (or reuses) the chart's series and rasterizes it; None if drawing failed."""
+    try:
+        with span("chart.render"):
+            store = get_store()
+            store.backfill()  # Categories current before the key is taken
+            key = store.data_key()
+            cached = cache.image(selected_chart, width, height, key) if cache else None
+            if cached is not None:
+                count("chart cache hits")
+                return cached
+
+            series = cache.series(selected_chart, key) if cache else None
+            if series is None:
+                with span("series"):
+                    series = chart_series(selected_chart, store)
+                if cache:
+                    cache.put_series(selected_chart, key, series)
+
+            with span("draw"):
+                rendered = draw_chart(selected_chart, series, width, height)
+            if cache:
+                cache.put_image(selected_chart, width, height, key, rendered)
+            return rendered
+
+    except Exception as e:
+        logger.exception("Error generating chart: %s", e)
+        return None
+
 
 class ReportsPage(QWidget):
     def __init__(self, switch_callback):
@@ -35,19 +208,12 @@ class ReportsPage(QWidget):
         self.chart_selector.currentIndexChanged.connect(self.update_chart)  # ✅ Auto-update on selection change
         layout.addWidget(self.chart_selector)
 
-        # 📉 Chart Area
-        self.figure = Figure(figsize=(5, 4))
-
-        self.canvas = FigureCanvas(self.figure)  # Slightly wider chart
-        layout.addWidget(self.canvas)
-
-        # Initialize pie and bar charts
-        self.pie_chart = FigureCanvas(Figure(figsize=(4, 3)))
-        self.bar_chart = FigureCanvas(Figure(figsize=(4, 3)))
-
-        # Add axes for pie and bar charts
-        self.pie_chart.axes = self.pie_chart.figure.add_subplot(111)
-        self.bar_chart.axes = self.bar_chart.figure.add_subplot(111)
+        # 📉 Chart Area (rendered off-thread with Agg, shown as an image; cached per data version)
+        self.chart_cache = ChartCache()
+        self.chart_view = QLabel("Loading chart...")
+        self.chart_view.setAlignment(Qt.AlignCenter)
+        self.chart_view.setMinimumSize(500, 400)
+        layout.addWidget(self.chart_view)
 
         # 🔙 Back to Dashboard Button
         back_btn = QPushButton("Back to Dashboard")
@@ -64,117 +230,27 @@ class ReportsPage(QWidget):
         # Apply layout
         self.setLayout(layout)
 
-        # Generate initial chart
-        self.update_chart()
+        # The chart is rendered by update_chart(), which MainWindow.switch_page calls on every visit
 
     def update_chart(self):
-        """Reads transaction data and updates the selected chart inside the GUI."""
-        try:
-            # Load transactions
-            df = pd.read_csv("transactions.csv", header=None, names=["Amount", "Date", "Category"])
-            df["Amount"] = pd.to_numeric(df["Amount"], errors="coerce")
-            df["Date"] = pd.to_datetime(df["Date"])
-
-            # Get selected chart type
-            selected_chart = self.chart_selector.currentText()
-            self.canvas.figure.clear()
-            ax = self.canvas.figure.add_subplot(111)
-
-            if selected_chart == "Pie Chart - Categories":
-                # Aggregate expenses by category
-                expenses = df[df["Amount"] < 0]
-                category_totals = expenses.groupby("Category")["Amount"].sum().abs()
-
-                # Generate color map
-                unique_categories = category_totals.index
-                colors = plt.cm.tab10.colors[:len(unique_categories)]  # Assign dynamic colors
-
-                # Create pie chart with enhanced labels
-                category_totals.plot(kind="pie", autopct="%1.1f%%", startangle=90, ax=ax, colors=colors)
-                ax.set_title("Spending by Category")
-                ax.set_ylabel("")  # Hide y-label
-
-            elif selected_chart == "Weekly Spending":
-                # Group expenses by week
-                expenses = df[df["Amount"] < 0]
-                expenses["Week"] = expenses["Date"].dt.to_period("W")
-                weekly_totals = expenses.groupby("Week")["Amount"].sum().abs()
-
-                # Improved bar chart with labels
-                weekly_totals.plot(kind="bar", color="blue", ax=ax)
-                ax.set_title("Weekly Spending Trend")
-                ax.set_xlabel("Week")
-                ax.set_ylabel("Total Spent (₹)")
-                ax.grid(True, linestyle="--", alpha=0.6)
-
-                # Add data labels for better readability
-                for i, v in enumerate(weekly_totals):
-                    ax.text(i, v + 200, f"₹{int(v)}", ha="center", fontsize=10, fontweight="bold")
-
-            elif selected_chart == "Monthly Breakdown":
-                # Group expenses by month
-                expenses = df[df["Amount"] < 0]
-                expenses["Month"] = expenses["Date"].dt.to_period("M")
-                monthly_totals = expenses.groupby(["Month", "Category"])["Amount"].sum().abs().unstack()
-
-                # Stacked bar chart with category-wise spending
-                monthly_totals.plot(kind="bar", stacked=True, ax=ax, cmap="coolwarm")
-                ax.set_title("Monthly Spending Breakdown")
-                ax.set_xlabel("Month")
-                ax.set_ylabel("Total Spent (₹)")
-                ax.legend(title="Category", bbox_to_anchor=(1.05, 1), loc="upper left")
-
-            elif selected_chart == "Monthly Comparison":
-                # Compare total spending across months + add trend line
-                expenses = df[df["Amount"] < 0]
-                expenses["Month"] = expenses["Date"].dt.to_period("M")
-                monthly_totals = expenses.groupby("Month")["Amount"].sum().abs()
-
-                monthly_totals.plot(kind="bar", color="red", ax=ax)
-                ax.set_title("Month-to-Month Spending Comparison")
-                ax.set_xlabel("Month")
-                ax.set_ylabel("Total Spent (₹)")
-
-                # Add trend line (Linear Fit)
-                x = np.arange(len(monthly_totals))
-                y = monthly_totals.values
-                m, b = np.polyfit(x, y, 1)  # Linear regression
-                ax.plot(x, m*x + b, color="blue", linestyle="dashed", linewidth=2)
-
-            # Refresh Canvas
-            self.canvas.draw()
-
-        except Exception as e:
-            print(f"Error generating chart: {e}")
-            
-    def update_charts(self, categorized_totals, category_counts):
-        """Updates the pie chart and bar chart using AI-enhanced categories"""
-        from matplotlib import pyplot as plt
-
-        # Clear previous charts
-        self.pie_chart.axes.clear()
-        self.bar_chart.axes.clear()
-
-        # Pie chart (category-wise expense breakdown)
-        if categorized_totals:
-            labels = list(categorized_totals.keys())
-            sizes = list(categorized_totals.values())
-            self.pie_chart.axes.pie(sizes, labels=labels, autopct='%1.1f%%', startangle=90)
-            self.pie_chart.axes.set_title("Expenses by Category (AI-based)")
-        else:
-            self.pie_chart.axes.text(0.5, 0.5, "No Data", horizontalalignment='center', verticalalignment='center')
-
-        # Bar chart (category frequency)
-        if category_counts:
-            labels = list(category_counts.keys())
-            counts = list(category_counts.values())
-            self.bar_chart.axes.bar(labels, counts, color='skyblue')
-            self.bar_chart.axes.set_title("Number of Transactions per Category")
-            self.bar_chart.axes.set_ylabel("Count")
-            self.bar_chart.axes.set_xlabel("Category")
-        else:
-            self.bar_chart.axes.text(0.5, 0.5, "No Data", horizontalalignment='center', verticalalignment='center')
-
-        # Redraw charts
-        self.pie_chart.draw()
-        self.bar_chart.draw()
+        """Shows a cached chart if the data has not changed, otherwise renders it on a worker thread."""
+        selected_chart = self.chart_selector.currentText()
+        width = max(self.chart_view.width(), 500)
+        height = max(self.chart_view.height(), 400)
+        cached = self.chart_cache.image(selected_chart, width, height, get_store().data_key())
+        if cached is not None:
+            count("chart cache hits")
+            get_scheduler().cancel("chart")  # A render for the previous selection would overwrite it
+            self.show_chart(cached)
+            return
+        get_scheduler().submit(
+            "chart", render_chart, selected_chart, width, height, self.chart_cache, on_done=self.show_chart
+        )
+
+    def show_chart(self, rendered):
+        if rendered is None:
+            self.chart_view.setText("Could not draw this chart (see the log).")
+            return
+        data, width, height = rendered
+        image = QImage(data, width, height, QImage.Format_RGBA8888).copy()
+        self.chart_view.setPixmap(QPixmap.fromImage(image))
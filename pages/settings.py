@@ -1,16 +1,45 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel
+import logging
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QFormLayout, QPushButton, QLabel, QLineEdit
 from PySide6.QtCore import Qt
+from core.rules import KNOWN_CATEGORIES
+
+logger = logging.getLogger(__name__)
+
+# Categories that can carry a monthly budget
+BUDGET_CATEGORIES = [category.capitalize() for category in sorted(KNOWN_CATEGORIES) if category != "income"]
 
 class SettingsPage(QWidget):
-    def __init__(self, switch_callback, apply_theme_callback):
+    def __init__(self, switch_callback, apply_theme_callback, budgets=None, save_budgets_callback=None):
         super().__init__()
 
         self.apply_theme_callback = apply_theme_callback  # Function to apply the selected theme
+        self.save_budgets_callback = save_budgets_callback  # Called with {category: monthly limit}
         
         # Layout setup
         layout = QVBoxLayout()
         layout.setAlignment(Qt.AlignTop)
-        # Inside SettingsPage's __init__ method
+
+        # 💰 Monthly budgets (empty means no limit)
+        budgets_title = QLabel("💰 Monthly Budgets")
+        budgets_title.setStyleSheet("font-size: 28px; font-weight: bold; color: #FFFFFF;")
+        budgets_title.setAlignment(Qt.AlignCenter)
+        layout.addWidget(budgets_title)
+
+        budgets = budgets or {}
+        budget_form = QFormLayout()
+        self.budget_inputs = {}
+        for category in sorted(set(BUDGET_CATEGORIES) | set(budgets)):
+            field = QLineEdit()
+            field.setPlaceholderText("No limit")
+            if category in budgets:
+                field.setText(f"{budgets[category]:g}")
+            field.setStyleSheet("font-size: 14px; padding: 5px; border: 1px solid #666666; border-radius: 5px; color: #FFFFFF; background-color: #222222;")
+            label = QLabel(f"{category}:")
+            label.setStyleSheet("font-size: 16px; color: #FFFFFF;")
+            budget_form.addRow(label, field)
+            self.budget_inputs[category] = field
+        layout.addLayout(budget_form)
+
         save_button = QPushButton("Save Budgets")
         save_button.setStyleSheet("background-color: #4CAF50; color: white; font-size: 16px; padding: 10px; border-radius: 5px;")
         save_button.clicked.connect(self.save_budgets)
@@ -54,16 +83,15 @@ class SettingsPage(QWidget):
         for category, field in self.budget_inputs.items():
             try:
                 amount = float(field.text())
-                new_budgets[category] = amount
+                if amount > 0:
+                    new_budgets[category] = amount
             except ValueError:
                 pass
 
-        # ✅ Access the main window
-        main_window = self.parent().parent().parent()  # adjust if your structure is different
-
-        # ✅ Save budgets in memory and JSON
-        main_window.budgets = new_budgets
-        
+        # ✅ Save budgets to settings.json and the running budget engine
+        if self.save_budgets_callback:
+            self.save_budgets_callback(new_budgets)
+        logger.info("Saved budgets: %s", new_budgets)
 
 
     def apply_theme(self, theme):
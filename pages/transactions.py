@@ -1,7 +1,123 @@
-import csv
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton
-from PySide6.QtCore import Qt
+import numpy as np
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QTableView, QPushButton, QLineEdit, QAbstractItemView,
+                               QFileDialog, QMessageBox)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
 from PySide6.QtGui import QColor
+from core.instrumentation import span
+from core.store import get_store
+from core.tasks import get_scheduler
+
+# Shared brushes; the model hands these out instead of allocating per cell
+NEGATIVE_COLOR = QColor("red")
+POSITIVE_COLOR = QColor("green")
+CATEGORY_COLOR = QColor("cyan")
+
+
+class TransactionsModel(QAbstractTableModel):
+    """Read-only table over column lists; cells are only produced for rows the view asks for.
+
+    Sorting keeps a row permutation instead of moving data, so it costs
+    one argsort and never touches the view.
+    """
+
+    HEADERS = ["Amount (₹)", "Description", "Category"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.amounts, self.descriptions, self.categories = [], [], []
+        self.order = None  # View row -> data index, None means ledger order
+        self._haystack = None  # Lowercased "amount description category" per row, built on first filter
+
+    def set_columns(self, amounts, descriptions, categories):
+        self.beginResetModel()
+        self.amounts, self.descriptions, self.categories = amounts, descriptions, categories
+        self.order = None
+        self._haystack = None
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.amounts)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 3
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data_index(self, row):
+        return row if self.order is None else int(self.order[row])
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        i = self.data_index(index.row())
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(self.amounts[i])
+            return self.descriptions[i] if column == 1 else self.categories[i]
+        if role == Qt.ForegroundRole:
+            if column == 0:
+                return NEGATIVE_COLOR if self.amounts[i] < 0 else POSITIVE_COLOR
+            return CATEGORY_COLOR if column == 2 else None
+        if role == Qt.TextAlignmentRole:
+            return int(Qt.AlignCenter)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        if column == 0:
+            permutation = np.argsort(np.asarray(self.amounts, dtype=np.float64), kind="stable")
+        else:
+            values = self.descriptions if column == 1 else self.categories
+            permutation = np.array(sorted(range(len(values)), key=lambda i: values[i].lower()), dtype=np.int64)
+        self.order = permutation[::-1] if order == Qt.DescendingOrder else permutation
+        self.layoutChanged.emit()
+
+    def filter_mask(self, text):
+        """Per data index: does the row contain text (case-insensitive) in any column?"""
+        if self._haystack is None:
+            self._haystack = [
+                f"{amount} {description} {category}".lower()
+                for amount, description, category in zip(self.amounts, self.descriptions, self.categories)
+            ]
+        text = text.lower()
+        return [text in row for row in self._haystack]
+
+
+class TransactionsFilterProxy(QSortFilterProxyModel):
+    """Filters with a precomputed mask and hands sorting to the source's permutation."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._mask = None
+
+    def set_filter_text(self, text):
+        source = self.sourceModel()
+        self._mask = source.filter_mask(text) if text.strip() else None
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._mask is None:
+            return True
+        return self._mask[self.sourceModel().data_index(source_row)]
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # Keep the proxy unsorted (source order) and let the model reorder itself
+        self.sourceModel().sort(column, order)
+        self.invalidateFilter()
+
+
+def load_rows():
+    """(data key, columns) with categories current; runs on a worker thread."""
+    with span("table.load"):
+        store = get_store()
+        store.backfill()
+        key = store.data_key()
+        return key, store.snapshot()
+
 
 class TransactionsPage(QWidget):
     def __init__(self, switch_callback):
@@ -27,12 +143,32 @@ class TransactionsPage(QWidget):
         title.setAlignment(Qt.AlignCenter)
         layout.addWidget(title)
 
-        # 📊 Transaction Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(3)
-        self.table.setHorizontalHeaderLabels(["Amount (₹)", "Description", "Category"])
+        # 🔎 Filter
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter by amount, description or category")
+        self.filter_input.setStyleSheet("""
+            font-size: 14px;
+            padding: 5px;
+            border: 1px solid #666666;
+            border-radius: 5px;
+            color: #FFFFFF;
+            background-color: #222222;
+        """)
+        layout.addWidget(self.filter_input)
+
+        # 📊 Transaction Table (model/view: only visible rows are materialized)
+        self.model = TransactionsModel(self)
+        self.proxy = TransactionsFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.filter_input.textChanged.connect(self.proxy.set_filter_text)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
         self.table.horizontalHeader().setStretchLastSection(True)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setDefaultSectionSize(28)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.table.setStyleSheet("""
             QHeaderView::section {
                 background-color: #444444;
@@ -43,18 +179,32 @@ class TransactionsPage(QWidget):
                 border: none;
                 border-bottom: 1px solid #666666;
             }
-            QTableWidget {
+            QTableView {
                 background-color: #222222;
                 color: #FFFFFF;
                 font-size: 14px;
                 border: 1px solid #444444;
             }
-            QTableWidget::item {
+            QTableView::item {
                 border-bottom: 1px solid #666666;
             }
         """)
         layout.addWidget(self.table)
 
+        # 📥 Bulk import of bank statements (runs in the background, one write at the end)
+        self.import_btn = QPushButton("Import Statements")
+        self.import_btn.setStyleSheet("""
+            background-color: #444444;
+            color: #FFFFFF;
+            font-size: 16px;
+            font-weight: bold;
+            padding: 10px;
+            border: none;
+            border-radius: 5px;
+        """)
+        self.import_btn.clicked.connect(self.import_statements)
+        layout.addWidget(self.import_btn)
+
         # 🔙 Back Button
         back_btn = QPushButton("Back to Dashboard")
         back_btn.setStyleSheet("""
@@ -70,78 +220,47 @@ class TransactionsPage(QWidget):
         layout.addWidget(back_btn)
 
         self.setLayout(layout)
-        self.update_table()
+        # Rows are filled by update_table(), which MainWindow.switch_page calls on every visit
+        self.rendered_key = None  # Store data_key() of the rows on screen
 
-    def categorize_expense(self, description):
-        """Assigns an expense category based on keywords."""
-        rules = {
-            "Food": ["pizza", "burger", "restaurant", "cafe", "restaurant food","groceries","snacks","icecream"],
-            "Transport": ["uber ride", "bus", "train", "taxi", "fuel","ola ride","uber"],
-            "Entertainment": ["netflix", "cinema", "movie", "concert", "game","checking out","trip"],
-            "Shopping": ["amazon", "mall", "clothing", "electronics","flipkart headphones","groceries"],
-            "Utilities": ["electricity", "water", "internet", "gas", "rent","laundry"],
-            "Stationary":["pen","notebooks","printer paper","internet subscription"]
-        }
+    def update_table(self):
+        """Snapshots the columns on a worker thread and swaps the model, unless the data is unchanged."""
+        if self.rendered_key == get_store().data_key():
+            return
+        get_scheduler().submit("table", load_rows, on_done=self.fill_table)
 
-        description = description.lower()  # Convert text to lowercase for matching
-        for category, keywords in rules.items():
-            if any(keyword in description for keyword in keywords):
-                return category  # Return matched category
+    def import_statements(self):
+        """Asks for bank statement files and imports them on a worker thread."""
+        paths, _selected_filter = QFileDialog.getOpenFileNames(
+            self, "Import Bank Statements", "", "Bank statements (*.csv *.ofx *.qfx *.qif)"
+        )
+        if not paths:
+            return
+        from core.importer import import_statements
 
-        return "Other"  # Default if no match found
+        self.import_btn.setEnabled(False)
+        get_scheduler().submit(
+            "import", import_statements, paths, on_done=self.import_finished, on_error=self.import_failed
+        )
 
-    def update_table(self):
-        """Reads transactions, assigns categories only if needed, and updates the UI."""
-        self.table.setRowCount(0)  # Clear existing rows
-        
-        updated_rows = []
-        try:
-            print("Reading transactions.csv...")
-            with open("transactions.csv", "r") as file:
-                reader = csv.reader(file)
-                for row_data in reader:
-                    if len(row_data) != 3:
-                        continue  # skip bad rows
-                        
-                    amount, date, third = row_data
-
-                    # 🧠 Detect if 'third' is a known category
-                    known_categories = {
-                        "food", "transport", "entertainment", "shopping", "utilities", "stationary", "income", "other"
-                    }
-                    
-                    third_lower = third.strip().lower()
-                    if third_lower in known_categories:
-                        category = third.capitalize()
-                        description = category  # optional: you can set empty string if you don't have one
-                    else:
-                        description = third
-                        category = self.categorize_expense(description)
-                        
-                    updated_rows.append([amount, date, category]) 
-                    row = self.table.rowCount()
-                    self.table.insertRow(row)
-
-
-                    # ➕ Amount with coloring
-                    item_amount = QTableWidgetItem(amount)
-                    item_amount.setTextAlignment(Qt.AlignCenter)
-                    item_amount.setForeground(QColor("red") if float(amount) < 0 else QColor("green"))
-                    self.table.setItem(row, 0, item_amount)
-
-                    # ➕ Description (if it's an actual description)
-                    item_description = QTableWidgetItem(description)
-                    item_description.setTextAlignment(Qt.AlignCenter)
-                    self.table.setItem(row, 1, item_description)
-
-                    # ➕ Category (from either source)
-                    item_category = QTableWidgetItem(category)
-                    item_category.setTextAlignment(Qt.AlignCenter)
-                    item_category.setForeground(QColor("cyan"))
-                    self.table.setItem(row, 2, item_category)
-            with open("transactions.csv", "w", newline="") as file:
-                writer = csv.writer(file)
-                writer.writerows(updated_rows)
-
-        except FileNotFoundError:
-            print("No transactions found. CSV file does not exist.")
+    def import_finished(self, result):
+        imported, duplicates = result
+        self.import_btn.setEnabled(True)
+        self.update_table()
+        QMessageBox.information(
+            self, "Import Complete", f"Imported {imported} transactions.\nSkipped {duplicates} already in the ledger."
+        )
+
+    def import_failed(self, message):
+        self.import_btn.setEnabled(True)
+        QMessageBox.warning(self, "Import Failed", message)
+
+    def fill_table(self, result):
+        """Points the model at fresh columns; the view pulls only the cells it displays."""
+        with span("table.fill"):
+            self.rendered_key, (amounts, _dates, descriptions, categories) = result
+            self.model.set_columns(amounts, descriptions, categories)
+            self.proxy.set_filter_text(self.filter_input.text())
+            header = self.table.horizontalHeader()
+            if header.sortIndicatorSection() >= 0:
+                self.model.sort(header.sortIndicatorSection(), header.sortIndicatorOrder())